@@ -0,0 +1,232 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import threading
+import traceback
+from time import time
+from multiprocessing import Pool
+from typing import List, NamedTuple, Optional, Tuple
+
+from game.board.board import Board
+from game.board.cell import RowInstructions
+from game.board.image_utils import common_dir, output_name
+from game.board.instructions_utils import read_puzzles, is_puzzle_file
+from game.solver.budget import Budget, BudgetExceeded
+from game.solver.difficulty import DifficultyGrader
+from game.solver.iterative_solver import IterativeGuessSolver, IterativeBestInfoGuessSolver, \
+    IterativeProbingGuessSolver
+
+INSTRUCTIONS_EXTENSIONS = ('.ins',)
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif')
+SOLVERS = {
+    'iterative': IterativeGuessSolver,
+    'best-info': IterativeBestInfoGuessSolver,
+    'probing': IterativeProbingGuessSolver,
+}
+SUMMARY_FILE = 'summary.jsonl'
+
+SOLVED = 'solved'
+UNSOLVABLE = 'unsolvable'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+
+class PuzzleTask(NamedTuple):
+    path: str
+    output_dir: str
+    solver: str
+    use_line_solver: bool
+    timeout: float
+    # Set for the puzzles of multi puzzle files, which are sent to the workers as instructions.
+    name: Optional[str] = None
+    instructions: Optional[Tuple[List[List[int]], List[List[int]]]] = None
+    grade: bool = False
+    # The solved image's file name (without extension) in the output directory, see output_name().
+    output_name: Optional[str] = None
+    # Set instead of the instructions when the puzzle file could not be read, the task is reported as an error.
+    error: Optional[str] = None
+
+
+def is_supported_file(path: str):
+    return is_puzzle_file(path) or os.path.splitext(path)[1].lower() in INSTRUCTIONS_EXTENSIONS + IMAGE_EXTENSIONS
+
+
+def find_puzzles(inputs: List[str]):
+    # Every input is a puzzle file, a directory (searched for puzzle files, not recursively) or a glob pattern.
+    paths = []
+    for puzzle_input in inputs:
+        if os.path.isdir(puzzle_input):
+            names = sorted(os.listdir(puzzle_input))
+            paths.extend(os.path.join(puzzle_input, name) for name in names)
+        elif os.path.isfile(puzzle_input):
+            paths.append(puzzle_input)
+        else:
+            paths.extend(sorted(glob.glob(puzzle_input)))
+    return [path for path in paths if os.path.isfile(path) and is_supported_file(path)]
+
+
+def iter_tasks(paths: List[str], output_dir: str, solver: str, use_line_solver: bool, timeout: float,
+               grade: bool = False):
+    # Multi puzzle files are read lazily, a task per puzzle.
+    root = common_dir(paths)
+    for path in paths:
+        if is_puzzle_file(path):
+            try:
+                for name, row_instructions, column_instructions in read_puzzles(path):
+                    instructions = ([list(ins) for ins in row_instructions],
+                                    [list(ins) for ins in column_instructions])
+                    yield PuzzleTask(path, output_dir, solver, use_line_solver, timeout, name, instructions, grade,
+                                     output_name(path, root, name))
+            except Exception as e:
+                # The rest of a broken file cannot be read, but the other files still are. The puzzles read before
+                # the error were already sent.
+                yield PuzzleTask(path, output_dir, solver, use_line_solver, timeout, grade=grade,
+                                 output_name=output_name(path, root), error=describe_error(e))
+        else:
+            yield PuzzleTask(path, output_dir, solver, use_line_solver, timeout, grade=grade,
+                             output_name=output_name(path, root))
+
+
+def load_board(path: str):
+    if os.path.splitext(path)[1].lower() in INSTRUCTIONS_EXTENSIONS:
+        return Board.from_instruction_file(path)
+    return Board.from_file(path)
+
+
+def puzzle_name(path: str):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def load_task_board(task: PuzzleTask):
+    if task.instructions is None:
+        return load_board(task.path)
+    row_instructions, column_instructions = task.instructions
+    return Board([RowInstructions.from_list(ins) for ins in row_instructions],
+                 [RowInstructions.from_list(ins) for ins in column_instructions])
+
+
+def get_budget(deadline: Optional[float]):
+    # The time left until the task's deadline, None if the task has no timeout.
+    if deadline is None:
+        return None
+    return Budget(max_seconds=max(deadline - time(), 0.0))
+
+
+def grade_puzzle(board: Board, task: PuzzleTask, deadline: Optional[float] = None):
+    # Graded without search on a board of its own. Probing can take long, so the grader only gets the time left
+    # until the task's deadline.
+    grader = DifficultyGrader(Board(board.row_instructions, board.column_instructions), task.use_line_solver,
+                              search=False)
+    grader.budget = get_budget(deadline)
+    try:
+        grade = grader.grade()
+    except BudgetExceeded:
+        return {'grade': TIMEOUT}
+    return {'grade': grade.grade, 'propagation_rounds': grade.propagation_rounds, 'probes': grade.probes}
+
+
+def describe_error(error: Exception):
+    return ''.join(traceback.format_exception_only(type(error), error)).strip()
+
+
+def solve_puzzle(task: PuzzleTask):
+    # Solves a single puzzle and returns its summary record. Solved boards are saved as images in the output
+    # directory. The timeout covers the whole task, the grading gets whatever time the solve left.
+    deadline = time() + task.timeout if task.timeout else None
+    record = {'name': task.name or puzzle_name(task.path), 'path': task.path, 'solver': task.solver}
+    solver = None
+    if task.error is not None:
+        record['status'] = ERROR
+        record['error'] = task.error
+        return record
+    try:
+        board = load_task_board(task)
+        record['rows'], record['columns'] = board.get_size()
+        solver = SOLVERS[task.solver](board, use_line_solver=task.use_line_solver)
+        solver.budget = get_budget(deadline)
+        solver.start_count_time_()
+        solved = solver.search_()
+        solver.stop_count_time_()
+        record['status'] = SOLVED if solved else UNSOLVABLE
+        if solved:
+            output_path = os.path.join(task.output_dir, (task.output_name or record['name']) + '.png')
+            board.to_image(output_path)
+            record['output'] = output_path
+        if task.grade:
+            record.update(grade_puzzle(board, task, deadline))
+    except BudgetExceeded:
+        solver.abandon_search_()
+        solver.stop_count_time_()
+        record['status'] = TIMEOUT
+        if task.grade:
+            record['grade'] = TIMEOUT
+    except Exception as e:
+        record['status'] = ERROR
+        record['error'] = describe_error(e)
+    if solver is not None and solver.duration_in_milli_seconds is not None:
+        record['ms'] = round(solver.duration_in_milli_seconds, 3)
+        record['steps'] = solver.board.get_steps()
+        record['guesses'] = solver.get_guesses()
+    return record
+
+
+def iter_batch(inputs: List[str], output_dir: str, solver: str = 'iterative', use_line_solver: bool = True,
+               timeout: float = None, processes: int = None, summary_path: str = None, in_flight: int = None,
+               grade: bool = False):
+    # Solves all the puzzles across a process pool, and writes a JSON line per puzzle to the summary file, in the
+    # order the puzzles finish. Yields the records as they come.
+    os.makedirs(output_dir, exist_ok=True)
+    summary_path = summary_path or os.path.join(output_dir, SUMMARY_FILE)
+    tasks = iter_tasks(find_puzzles(inputs), output_dir, solver, use_line_solver, timeout, grade)
+    # The pool reads tasks as fast as it can, so at most in_flight puzzles are read ahead of the finished ones.
+    slots = threading.BoundedSemaphore(in_flight or 16 * (processes or os.cpu_count()))
+
+    def throttled_tasks():
+        for task in tasks:
+            slots.acquire()
+            yield task
+
+    with open(summary_path, 'w') as summary, Pool(processes) as pool:
+        for record in pool.imap_unordered(solve_puzzle, throttled_tasks()):
+            slots.release()
+            summary.write(json.dumps(record) + '\n')
+            summary.flush()
+            yield record
+
+
+def run_batch(inputs: List[str], output_dir: str, solver: str = 'iterative', use_line_solver: bool = True,
+              timeout: float = None, processes: int = None, summary_path: str = None, grade: bool = False):
+    return list(iter_batch(inputs, output_dir, solver, use_line_solver, timeout, processes, summary_path,
+                           grade=grade))
+
+
+def parse_args(args: List[str] = None):
+    parser = argparse.ArgumentParser(
+        description='Solve a batch of nonogram puzzles (.ins files, multi puzzle files and images).')
+    parser.add_argument('inputs', nargs='+', help='puzzle files, directories or glob patterns')
+    parser.add_argument('-o', '--output-dir', default='solutions', help='where the solved images are written')
+    parser.add_argument('-s', '--solver', choices=sorted(SOLVERS), default='iterative')
+    parser.add_argument('-t', '--timeout', type=float, default=None, help='per puzzle timeout in seconds')
+    parser.add_argument('-p', '--processes', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--summary', default=None, help='summary file (default: <output-dir>/' + SUMMARY_FILE + ')')
+    parser.add_argument('--no-line-solver', dest='use_line_solver', action='store_false',
+                        help='use the original row analyzer instead of the line solver')
+    parser.add_argument('--grade', action='store_true', help='add the difficulty grade of every puzzle')
+    return parser.parse_args(args)
+
+
+def main(args: List[str] = None):
+    options = parse_args(args)
+    solved = total = 0
+    for record in iter_batch(options.inputs, options.output_dir, options.solver, options.use_line_solver,
+                             options.timeout, options.processes, options.summary, grade=options.grade):
+        solved += record['status'] == SOLVED
+        total += 1
+    print('Solved {} of {} puzzles'.format(solved, total), file=sys.stderr)
+    return 0 if solved == total else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
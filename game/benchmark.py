@@ -0,0 +1,193 @@
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tracemalloc
+from time import perf_counter
+from typing import Callable, List, NamedTuple
+
+import numpy as np
+
+from game.board.board import Board
+from game.board.cell import RowInstructions
+from game.board.image_utils import run_lengths
+from game.solver.analyze_the_guess_solver import AnalyzeThenGuessSolver, AnalyzeSkipUnchangedInfoGuessSolver, \
+    AnalyzeThenBestInfoGuessSolver
+from game.solver.budget import Budget, GAVE_UP
+from game.solver.guess_solver import GuessSolver, BestInfoGuessSolver
+from game.solver.iterative_solver import IterativeGuessSolver, IterativeProbingGuessSolver
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+SOLVERS = {
+    'guess': GuessSolver,
+    'best-info': BestInfoGuessSolver,
+    'analyze': AnalyzeThenGuessSolver,
+    'analyze-skip': AnalyzeSkipUnchangedInfoGuessSolver,
+    'analyze-best-info': AnalyzeThenBestInfoGuessSolver,
+    'iterative': lambda board: IterativeGuessSolver(board, use_line_solver=True),
+    'probing': lambda board: IterativeProbingGuessSolver(board, use_line_solver=True),
+}
+BUNDLED_INSTRUCTIONS = ['1.ins', '2.ins', '3.ins']
+BUNDLED_IMAGES = ['heart.png', 'N2.png', 'N3.png', '1.png']
+RANDOM_SIZES = [5, 8, 10, 12, 15]
+RANDOM_DENSITIES = [0.3, 0.5, 0.7]
+
+SOLVED = 'solved'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+
+class Puzzle(NamedTuple):
+    name: str
+    # Builds a fresh board for every run.
+    load: Callable[[], Board]
+
+
+def random_board(size: int, density: float, seed: int):
+    rand = random.Random(seed)
+    filled = np.array([[rand.random() < density for _ in range(size)] for _ in range(size)], dtype=bool)
+    return Board([RowInstructions.from_list(ins) for ins in run_lengths(filled)],
+                 [RowInstructions.from_list(ins) for ins in run_lengths(filled.T)])
+
+
+def default_corpus(sizes: List[int] = None, densities: List[float] = None, seed: int = 0):
+    # The bundled puzzles (except the big images), and a random board for every size and density.
+    puzzles = []
+    for name in BUNDLED_INSTRUCTIONS:
+        path = os.path.join(DATA_DIR, 'instructions', name)
+        puzzles.append(Puzzle(name, lambda path=path: Board.from_instruction_file(path)))
+    for name in BUNDLED_IMAGES:
+        path = os.path.join(DATA_DIR, 'images', name)
+        puzzles.append(Puzzle(name, lambda path=path: Board.from_file(path)))
+    for size in sizes or RANDOM_SIZES:
+        for density in densities or RANDOM_DENSITIES:
+            name = 'random-{}-{}-{}'.format(size, density, seed)
+            puzzles.append(Puzzle(name, lambda size=size, density=density: random_board(size, density, seed)))
+    return puzzles
+
+
+def run_once_(solver_factory, puzzle: Puzzle, timeout: float):
+    board = puzzle.load()
+    solver = solver_factory(board)
+    start = perf_counter()
+    # The solvers print the board when they are done, solve_within silences them.
+    result = solver.solve_within(Budget(max_seconds=timeout or None))
+    milli_seconds = (perf_counter() - start) * 1000
+    if result.status == GAVE_UP:
+        status = TIMEOUT
+    else:
+        status = SOLVED if board.is_board_solved() else FAILED
+    return status, milli_seconds, board.get_steps(), solver.get_guesses()
+
+
+def benchmark_puzzle(solver_name: str, puzzle: Puzzle, repeats: int = 5, timeout: float = 10.0,
+                     measure_memory: bool = True):
+    # Times repeated runs (taking the median), and measures the peak memory in one more run, since tracing the
+    # allocations slows the solver down.
+    solver_factory = SOLVERS[solver_name]
+    times = []
+    status = steps = guesses = None
+    for _ in range(repeats):
+        status, milli_seconds, steps, guesses = run_once_(solver_factory, puzzle, timeout)
+        times.append(milli_seconds)
+        if status == TIMEOUT:
+            break
+    record = {'solver': solver_name, 'puzzle': puzzle.name, 'status': status, 'runs': len(times),
+              'median_ms': round(statistics.median(times), 3), 'min_ms': round(min(times), 3),
+              'steps': steps, 'guesses': guesses}
+    if measure_memory and status != TIMEOUT:
+        tracemalloc.start()
+        try:
+            run_once_(solver_factory, puzzle, timeout)
+            record['peak_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        finally:
+            tracemalloc.stop()
+    return record
+
+
+def run_benchmark(solver_names: List[str] = None, puzzles: List[Puzzle] = None, repeats: int = 5,
+                  timeout: float = 10.0, measure_memory: bool = True, progress: bool = False):
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeats': repeats,
+        'timeout': timeout,
+        'records': [],
+    }
+    for puzzle in puzzles if puzzles is not None else default_corpus():
+        for solver_name in solver_names or sorted(SOLVERS):
+            record = benchmark_puzzle(solver_name, puzzle, repeats, timeout, measure_memory)
+            results['records'].append(record)
+            if progress:
+                print(json.dumps(record), file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25, min_ms: float = 1.0):
+    # Lists the regressions against the baseline: a puzzle that is no longer solved, more guesses, or a median time
+    # that grew by more than the tolerance (and by at least min_ms, below which timings are mostly noise).
+    baseline_records = {(record['solver'], record['puzzle']): record for record in baseline['records']}
+    regressions = []
+    for record in results['records']:
+        base = baseline_records.get((record['solver'], record['puzzle']))
+        if base is None:
+            continue
+        name = '{} on {}'.format(record['solver'], record['puzzle'])
+        if base['status'] == SOLVED and record['status'] != SOLVED:
+            regressions.append('{}: {} (was {})'.format(name, record['status'], base['status']))
+            continue
+        if record['status'] != SOLVED:
+            continue
+        if base['guesses'] is not None and record['guesses'] > base['guesses']:
+            regressions.append('{}: {} guesses (was {})'.format(name, record['guesses'], base['guesses']))
+        if record['median_ms'] > base['median_ms'] * (1 + tolerance) and \
+                record['median_ms'] - base['median_ms'] >= min_ms:
+            regressions.append('{}: {:.2f} ms (was {:.2f} ms)'.format(name, record['median_ms'], base['median_ms']))
+    return regressions
+
+
+def save_results(results: dict, file_path: str):
+    with open(file_path, 'w') as fh:
+        json.dump(results, fh, indent=1)
+
+
+def load_results(file_path: str):
+    with open(file_path) as fh:
+        return json.load(fh)
+
+
+def parse_args(args: List[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmark the solvers on the bundled and random puzzles.')
+    parser.add_argument('-o', '--output', default='benchmark.json', help='results file')
+    parser.add_argument('-s', '--solvers', nargs='+', choices=sorted(SOLVERS), default=None)
+    parser.add_argument('-r', '--repeats', type=int, default=5)
+    parser.add_argument('-t', '--timeout', type=float, default=10.0, help='per run timeout in seconds')
+    parser.add_argument('--sizes', type=int, nargs='+', default=RANDOM_SIZES, help='random board sizes')
+    parser.add_argument('--densities', type=float, nargs='+', default=RANDOM_DENSITIES,
+                        help='random board densities')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', dest='measure_memory', action='store_false')
+    parser.add_argument('-b', '--baseline', default=None, help='results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    return parser.parse_args(args)
+
+
+def main(args: List[str] = None):
+    options = parse_args(args)
+    puzzles = default_corpus(options.sizes, options.densities, options.seed)
+    results = run_benchmark(options.solvers, puzzles, options.repeats, options.timeout, options.measure_memory,
+                            progress=True)
+    save_results(results, options.output)
+    if options.baseline is None:
+        return 0
+    regressions = compare(results, load_results(options.baseline), options.tolerance)
+    for regression in regressions:
+        print(regression)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,70 @@
-from typing import List, Any
+import mmap
+from typing import List, Any, NamedTuple, TYPE_CHECKING
 
-from game.board.cell import CellState, Location, Cell, CellRow, RowInstructions
-from game.board.image_utils import image_to_array, array_to_image
-from game.board.instructions_utils import instructions_from_file
+from game.board import serialization
+from game.board.cell import CellState, Location, Cell, CellRow, RowInstructions, CODE_STATES, UNSET_CODE, FILL_CODE
+from game.board.image_utils import image_to_array, array_to_image, image_to_bool_array, run_lengths, \
+    bool_to_state_matrix
+from game.board.instructions_utils import instructions_from_file, read_puzzles
+
+if TYPE_CHECKING:
+    from game.board.image_preprocessing import PreprocessOptions
+
+
+# Row, column or reversed line of a CellTable. Reads the cells from the table's flat list of cells through start and
+# step, without copying them into a list of its own.
+class CellLineView(CellRow):
+    def __init__(self, flat_cells: List[Cell], start: int, step: int, length: int):
+        self.flat_cells = flat_cells
+        self.start = start
+        self.step = step
+        self.length = length
+
+    @property
+    def cells(self):
+        return self.get_cells()
+
+    def indices_(self):
+        # The line's indices in the flat list of cells.
+        return range(self.start, self.start + self.length * self.step, self.step)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.length)
+            return CellLineView(self.flat_cells, self.start + start * self.step, self.step * step,
+                                len(range(start, stop, step)))
+        if key < 0:
+            key += self.length
+        if not 0 <= key < self.length:
+            raise IndexError(key)
+        return self.flat_cells[self.start + key * self.step]
+
+    def __setitem__(self, key, value):
+        if key in range(len(self)):
+            self[key].set_state(value.state)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        return map(self.flat_cells.__getitem__, self.indices_())
+
+    def set_state(self, index: int, state: CellState):
+        self[index].set_state(state)
+
+    def is_fully_set(self):
+        return UNSET_CODE not in self.get_codes()
+
+    def get_cells(self):
+        flat_cells = self.flat_cells
+        return [flat_cells[index] for index in self.indices_()]
+
+    def get_codes(self):
+        flat_cells = self.flat_cells
+        return [flat_cells[index].code for index in self.indices_()]
+
+    def reverse(self):
+        return CellLineView(self.flat_cells, self.start + (self.length - 1) * self.step, -self.step, self.length)
 
 
 class CellTable:
@@ -13,15 +75,19 @@ class CellTable:
                 self.columns = columns
             else:
                 self.columns = rows
-            self.table = [[Cell() for column in range(self.columns)] for row in range(self.rows)]
+            self.table = [[Cell(location=Location(row, column), table=self) for column in range(self.columns)]
+                          for row in range(self.rows)]
         elif array:
             self.rows = len(array)
             self.columns = len(array[0])
             self.table = [[Cell(state) for state in row] for row in array]
+        # The same cells, row after row, for the line views.
+        self.flat_cells = [cell for row in self.table for cell in row]
+        self.observer = None
 
     @classmethod
     def from_image(cls, image_path: str):
-        return CellTable(array=image_to_array(image_path))
+        return cls(array=image_to_array(image_path))
 
     def to_image(self, image_path: str):
         array_to_image([[cell.state.value for cell in col] for col in self.table], image_path)
@@ -37,17 +103,24 @@ class CellTable:
         self.assert_location(location)
         self.table[location.row][location.column].set_state(state)
 
+    def cell_changed_(self, location: Location, old_state: CellState, new_state: CellState):
+        if self.observer is not None:
+            self.observer.cell_changed_(location, old_state, new_state)
+
+    def restore_cell_state(self, location: Location, state: CellState):
+        self.table[location.row][location.column].restore_state(state)
+
     def get_row(self, row: int):
-        return CellRow(self.table[row])
+        return CellLineView(self.flat_cells, row * self.columns, 1, self.columns)
 
     def get_column(self, column: int):
-        return CellRow([self.table[row][column] for row in range(self.rows)])
+        return CellLineView(self.flat_cells, column, self.columns, self.rows)
 
     def __eq__(self, other):
         if self.rows != other.rows or self.columns != other.columns:
             return False
-        for row, other_row in zip(self.table, other.table):
-            for cell, other_cell in zip(row, other_row):
+        for row in range(self.rows):
+            for cell, other_cell in zip(self.get_row(row), other.get_row(row)):
                 if cell != other_cell:
                     return False
         return True
@@ -55,6 +128,10 @@ class CellTable:
     def get_size(self):
         return self.rows, self.columns
 
+    def encode(self):
+        # State codes of the whole table, row after row.
+        return b''.join(self.get_row(row).encode() for row in range(self.rows))
+
     def get_steps(self):
         steps = 0
         for row in self.table:
@@ -62,6 +139,22 @@ class CellTable:
                 steps += cell.get_changes_num()
         return steps
 
+    def get_cell_steps(self):
+        # Changes of every cell, row after row.
+        return [cell.get_changes_num() for row in self.table for cell in row]
+
+    def set_cell_steps(self, steps: List[int]):
+        for index, cell_steps in enumerate(steps):
+            row, column = divmod(index, self.columns)
+            self.table[row][column].changes = cell_steps
+
+
+class TrailEntry(NamedTuple):
+    location: Location
+    state: CellState
+    row_version: int
+    column_version: int
+
 
 def entry(text: Any = '', size: int = 3):
     template = '{:^' + str(size) + '}'
@@ -72,31 +165,86 @@ class Board:
     def __init__(self,
                  row_instructions: List[RowInstructions],
                  column_instructions: List[RowInstructions],
-                 solution_table: CellTable = None):
-        self.game_table = CellTable(len(row_instructions), len(column_instructions))
+                 solution_table: CellTable = None,
+                 table_type: type = CellTable):
+        self.game_table = table_type(len(row_instructions), len(column_instructions))
         self.row_instructions = row_instructions
         self.column_instructions = column_instructions
         self.solution_table = solution_table
         self.steps = 0
+        # Chronological TrailEntry of the changes made since the first decision level, and the trail length at the
+        # start of each level.
+        self.trail = []
+        self.levels = []
+        self.restoring = False
+        self.init_tracking_()
 
     @classmethod
-    def from_file(cls, image_path: str, with_solution: bool = False):
-        solution_table = CellTable.from_image(image_path)
-        row_instructions = []
-        column_instructions = []
-        for i in range(solution_table.rows):
-            row_instructions.append(RowInstructions(solution_table.get_row(i)))
-        for i in range(solution_table.columns):
-            column_instructions.append(RowInstructions(solution_table.get_column(i)))
-        if with_solution:
-            return Board(row_instructions, column_instructions, solution_table)
+    def from_file(cls, image_path: str, with_solution: bool = False, table_type: type = CellTable,
+                  preprocess_options: 'PreprocessOptions' = None):
+        if preprocess_options is None:
+            filled = image_to_bool_array(image_path)
         else:
-            return Board(row_instructions, column_instructions)
+            # Preprocessing needs OpenCV, which is only imported when it is used.
+            from game.board.image_preprocessing import preprocess_image
+            filled = preprocess_image(image_path, preprocess_options)
+        row_instructions = [RowInstructions.from_list(ins) for ins in run_lengths(filled)]
+        column_instructions = [RowInstructions.from_list(ins) for ins in run_lengths(filled.T)]
+        solution_table = None
+        if with_solution:
+            solution_table = table_type(array=bool_to_state_matrix(filled.tolist()))
+        return Board(row_instructions, column_instructions, solution_table, table_type)
 
     @classmethod
-    def from_instruction_file(cls, file_path):
+    def from_instruction_file(cls, file_path, table_type: type = CellTable):
         row_instructions, column_instructions = instructions_from_file(file_path)
-        return Board(row_instructions, column_instructions)
+        return Board(row_instructions, column_instructions, table_type=table_type)
+
+    @classmethod
+    def from_puzzle_file(cls, file_path: str, table_type: type = CellTable):
+        # Lazily yields (name, board) for every puzzle of a multi puzzle file.
+        for name, row_instructions, column_instructions in read_puzzles(file_path):
+            yield name, Board(row_instructions, column_instructions, table_type=table_type)
+
+    @classmethod
+    def from_bytes(cls, data, table_type: type = CellTable):
+        board_data = serialization.from_bytes(data)
+        solution_table = None
+        if board_data.solution_codes is not None:
+            columns = len(board_data.column_instructions)
+            states = [CODE_STATES[code] for code in board_data.solution_codes]
+            solution_table = table_type(array=[states[start:start + columns]
+                                               for start in range(0, len(states), columns)])
+        board = Board([RowInstructions.from_list(ins) for ins in board_data.row_instructions],
+                      [RowInstructions.from_list(ins) for ins in board_data.column_instructions],
+                      solution_table, table_type)
+        board.load_states(board_data.codes)
+        # Loading the states is not part of the board's history.
+        board.steps = board_data.board_steps or 0
+        rows, columns = board.get_size()
+        board.game_table.set_cell_steps(board_data.cell_steps or [0] * (rows * columns))
+        return board
+
+    @classmethod
+    def load(cls, file_path: str, table_type: type = CellTable):
+        # Reads a to_bytes() file through a memory map, so only the parts that are decoded get read.
+        with open(file_path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return cls.from_bytes(data, table_type)
+
+    def to_bytes(self, with_solution: bool = True, with_steps: bool = True):
+        solution_codes = None
+        if with_solution and self.solution_table is not None:
+            solution_codes = self.solution_table.encode()
+        return serialization.to_bytes(serialization.BoardData(
+            [list(ins) for ins in self.row_instructions],
+            [list(ins) for ins in self.column_instructions],
+            self.encode_states(),
+            solution_codes,
+            self.steps if with_steps else None,
+            self.game_table.get_cell_steps() if with_steps else None))
+
+    def save(self, file_path: str, with_solution: bool = True, with_steps: bool = True):
+        serialization.write_atomically(file_path, self.to_bytes(with_solution, with_steps))
 
     def to_image(self, image_path: str):
         self.game_table.to_image(image_path)
@@ -127,11 +275,132 @@ class Board:
     def is_row_solved_(row: CellRow, instructions: RowInstructions):
         return RowInstructions.is_row_solved(row, instructions)
 
+    def init_tracking_(self):
+        # Per line counters, updated on every cell change, so the solved queries below are O(1).
+        # A line is solved when its filled cells match its instructions, which can only happen once the number of
+        # filled cells equals the sum of the instructions, so only then the line is actually checked.
+        rows, columns = self.get_size()
+        self.unset_in_rows = [0] * rows
+        self.unset_in_columns = [0] * columns
+        self.filled_in_rows = [0] * rows
+        self.filled_in_columns = [0] * columns
+        for row in range(rows):
+            for column, code in enumerate(self.get_row(row).get_codes()):
+                if code == UNSET_CODE:
+                    self.unset_in_rows[row] += 1
+                    self.unset_in_columns[column] += 1
+                elif code == FILL_CODE:
+                    self.filled_in_rows[row] += 1
+                    self.filled_in_columns[column] += 1
+        self.unset_cells = sum(self.unset_in_rows)
+        # A line gets a new (never reused) version on every change of one of its cells, and gets its old version back
+        # when the change is backtracked, so a version always stands for the same line contents.
+        self.row_versions = [0] * rows
+        self.column_versions = [0] * columns
+        self.last_version = 0
+        self.row_fill_targets = [sum(ins) for ins in self.row_instructions]
+        self.column_fill_targets = [sum(ins) for ins in self.column_instructions]
+        self.solved_rows = [False] * rows
+        self.solved_columns = [False] * columns
+        self.solved_lines = 0
+        for row in range(rows):
+            self.update_row_solved_(row)
+        for column in range(columns):
+            self.update_column_solved_(column)
+        self.game_table.observer = self
+
+    def update_row_solved_(self, row: int):
+        solved = self.filled_in_rows[row] == self.row_fill_targets[row] and \
+            self.is_row_solved_(self.get_row(row), self.row_instructions[row])
+        self.solved_lines += solved - self.solved_rows[row]
+        self.solved_rows[row] = solved
+
+    def update_column_solved_(self, column: int):
+        solved = self.filled_in_columns[column] == self.column_fill_targets[column] and \
+            self.is_row_solved_(self.get_column(column), self.column_instructions[column])
+        self.solved_lines += solved - self.solved_columns[column]
+        self.solved_columns[column] = solved
+
+    def cell_changed_(self, location: Location, old_state: CellState, new_state: CellState):
+        if old_state == new_state:
+            return
+        row, column = location
+        if not self.restoring:
+            if self.levels:
+                self.trail.append(TrailEntry(location, old_state, self.row_versions[row], self.column_versions[column]))
+            self.last_version += 1
+            self.row_versions[row] = self.last_version
+            self.column_versions[column] = self.last_version
+        if old_state == CellState.UNSET:
+            self.unset_in_rows[row] -= 1
+            self.unset_in_columns[column] -= 1
+            self.unset_cells -= 1
+        elif new_state == CellState.UNSET:
+            self.unset_in_rows[row] += 1
+            self.unset_in_columns[column] += 1
+            self.unset_cells += 1
+        # Switching between UNSET and NO_FILL does not change which cells are filled.
+        if old_state == CellState.FILL or new_state == CellState.FILL:
+            delta = 1 if new_state == CellState.FILL else -1
+            self.filled_in_rows[row] += delta
+            self.filled_in_columns[column] += delta
+            self.update_row_solved_(row)
+            self.update_column_solved_(column)
+
+    def get_level(self):
+        return len(self.levels)
+
+    def push_level(self):
+        self.levels.append(len(self.trail))
+        return len(self.levels)
+
+    def backtrack_to(self, level: int):
+        # Undoes every change made after the given decision level, and drops the levels above it.
+        if level >= len(self.levels):
+            return
+        mark = self.levels[level]
+        del self.levels[level:]
+        trail = self.trail
+        self.restoring = True
+        for index in range(len(trail) - 1, mark - 1, -1):
+            location, state, row_version, column_version = trail[index]
+            self.game_table.restore_cell_state(location, state)
+            self.row_versions[location.row] = row_version
+            self.column_versions[location.column] = column_version
+        self.restoring = False
+        del trail[mark:]
+
+    def restore_levels(self, codes: bytes, levels: List[int], trail: List[TrailEntry], last_version: int,
+                       row_versions: List[int], column_versions: List[int]):
+        # Rebuilds a saved search on the empty board: the cells outside the trail are set before the first level, and
+        # every level gets the cells set on it, in their order. The versions are put back as they were saved.
+        columns = len(self.column_instructions)
+        trailed = {entry.location.row * columns + entry.location.column for entry in trail}
+        self.load_states(bytes(UNSET_CODE if index in trailed else code for index, code in enumerate(codes)))
+        for start, stop in zip(levels, levels[1:] + [len(trail)]):
+            self.push_level()
+            for entry in trail[start:stop]:
+                location = entry.location
+                self.set_cell_state(location, CODE_STATES[codes[location.row * columns + location.column]])
+        self.trail = list(trail)
+        self.last_version = last_version
+        self.row_versions = list(row_versions)
+        self.column_versions = list(column_versions)
+
     def is_row_solved(self, row_num: int):
-        return self.is_row_solved_(self.get_row(row_num), self.row_instructions[row_num])
+        return self.solved_rows[row_num]
 
     def is_column_solved(self, column_num: int):
-        return self.is_row_solved_(self.get_column(column_num), self.column_instructions[column_num])
+        return self.solved_columns[column_num]
+
+    def is_row_complete(self, row_num: int):
+        return self.unset_in_rows[row_num] == 0
+
+    def is_column_complete(self, column_num: int):
+        return self.unset_in_columns[column_num] == 0
+
+    def is_board_complete(self):
+        return self.unset_cells == 0
 
     def print_table(self, table: CellTable):
         rows = []
@@ -167,13 +436,19 @@ class Board:
 
     def is_board_solved(self):
         rows, columns = self.get_size()
-        for row in range(rows):
-            if not self.is_row_solved(row):
-                return False
-        for column in range(columns):
-            if not self.is_column_solved(column):
-                return False
-        return True
+        return self.solved_lines == rows + columns
+
+    def encode_states(self):
+        return self.game_table.encode()
+
+    def load_states(self, codes: bytes):
+        # Sets the game table to the given encode_states() result.
+        rows, columns = self.get_size()
+        for index, code in enumerate(codes):
+            location = Location(*divmod(index, columns))
+            state = CODE_STATES[code]
+            if self.get_cell_state(location) != state:
+                self.set_cell_state(location, state)
 
     def get_row_instructions(self, row):
         return self.row_instructions[row]
@@ -186,8 +461,8 @@ class Board:
 
     def is_there_mistake(self):
         if self.solution_table:
-            for row, sol_row in zip(self.game_table.table, self.solution_table.table):
-                for cell, sol_cell in zip(row, sol_row):
+            for row in range(self.game_table.rows):
+                for cell, sol_cell in zip(self.game_table.get_row(row), self.solution_table.get_row(row)):
                     if cell.get_state() != CellState.UNSET and cell != sol_cell:
                         return True
         return False
@@ -16,37 +16,77 @@ class CellState(Enum):
             return u"\u2588\u2588"
 
 
+# Small integer codes for the cell states, used by array backed tables.
+UNSET_CODE = 0
+FILL_CODE = 1
+NO_FILL_CODE = 2
+STATE_CODES = {CellState.UNSET: UNSET_CODE, CellState.FILL: FILL_CODE, CellState.NO_FILL: NO_FILL_CODE}
+CODE_STATES = (CellState.UNSET, CellState.FILL, CellState.NO_FILL)
+
+
 class Location(NamedTuple):
     row: int
     column: int
 
 
+# A board holds one cell per square, so cells keep their state as a code (see STATE_CODES) in slots, and the solver
+# tools compare the codes instead of the CellState members.
 class Cell:
-    def __init__(self, state: CellState = CellState.UNSET):
-        self.state = state
+    __slots__ = ('code', 'changes', 'row', 'column', 'table')
+
+    def __init__(self, state: CellState = CellState.UNSET, location: Location = None, table=None):
+        self.code = STATE_CODES[state]
         self.changes = 0
+        # Cells of a game table report their changes to it, so it can keep track of the board's state. The location
+        # is kept as two ints (small ones are shared by the interpreter) rather than a Location per cell.
+        self.row, self.column = location if location is not None else (None, None)
+        self.table = table
+
+    @property
+    def state(self):
+        return CODE_STATES[self.code]
+
+    @property
+    def location(self):
+        return Location(self.row, self.column) if self.row is not None else None
 
     def get_state(self):
-        return self.state
+        return CODE_STATES[self.code]
+
+    def get_code(self):
+        return self.code
+
+    def get_location(self):
+        return self.location
 
     def get_changes_num(self):
         return self.changes
 
     def set_state(self, state: CellState):
         self.changes = self.changes + 1
-        self.state = state
+        old_state = CODE_STATES[self.code]
+        self.code = STATE_CODES[state]
+        if self.table is not None:
+            self.table.cell_changed_(self.location, old_state, state)
+
+    def restore_state(self, state: CellState):
+        # Used when backtracking, so it is not counted as a change.
+        old_state = CODE_STATES[self.code]
+        self.code = STATE_CODES[state]
+        if self.table is not None:
+            self.table.cell_changed_(self.location, old_state, state)
 
     def to_bool(self):
-        return self.state.value
+        return CODE_STATES[self.code].value
 
     def __str__(self):
-        return str(self.state)
+        return str(CODE_STATES[self.code])
 
     def __eq__(self, other):
-        return self.state == other.state
+        return self.code == other.code
 
     def __hash__(self):
-        return hash((self.state, self.changes))
+        return hash((self.code, self.changes))
 
     @classmethod
     def from_bool(cls, state: bool):
@@ -72,13 +112,20 @@ class CellRow:
 
     def is_fully_set(self):
         for cell in self.cells:
-            if cell.state == CellState.UNSET:
+            if cell.code == UNSET_CODE:
                 return False
         return True
 
     def get_cells(self):
         return self.cells
 
+    def get_codes(self):
+        # State codes of the cells, as a list of ints.
+        return [cell.code for cell in self.cells]
+
+    def encode(self):
+        return bytes(self.get_codes())
+
     @classmethod
     def from_bool(cls, row: List[Optional[bool]]):
         return CellRow(list(map(lambda x: Cell(CellState(x)), row)))
@@ -89,18 +136,40 @@ class CellRow:
         return CellRow(reversed_cells)
 
 
+# Immutable clues of a line. The minimum lengths are computed once, so the solver tools walk the clues by offset
+# instead of building sub-instructions.
 class RowInstructions:
     def __init__(self, row: CellRow):
-        self.instructions = []
+        self.set_instructions_(self.count_fills_(row))
+
+    @staticmethod
+    def count_fills_(row: CellRow):
+        # Lengths of the filled runs of the row.
+        instructions = []
         fill_count = 0
-        for cell in row:
-            if cell.to_bool():
+        for code in row.get_codes():
+            if code == FILL_CODE:
                 fill_count += 1
             elif fill_count > 0:
-                self.instructions.append(fill_count)
+                instructions.append(fill_count)
                 fill_count = 0
         if fill_count > 0:
-            self.instructions.append(fill_count)
+            instructions.append(fill_count)
+        return tuple(instructions)
+
+    def set_instructions_(self, instructions: List[int]):
+        self.instructions = tuple(instructions)
+        count = len(self.instructions)
+        # prefix_min_lengths[i] is the minimum length of the first i instructions, suffix_min_lengths[i] of the
+        # instructions from i onward (each one separated from the next by a cell).
+        self.prefix_min_lengths = [0] * (count + 1)
+        self.suffix_min_lengths = [0] * (count + 1)
+        for index, ins in enumerate(self.instructions):
+            self.prefix_min_lengths[index + 1] = self.prefix_min_lengths[index] + ins + (index > 0)
+        for index in range(count - 1, -1, -1):
+            self.suffix_min_lengths[index] = self.suffix_min_lengths[index + 1] + self.instructions[index] + \
+                (index < count - 1)
+        self.reversed = None
 
     def get_instructions(self):
         return self.instructions
@@ -111,40 +180,41 @@ class RowInstructions:
     def __len__(self):
         return len(self.instructions)
 
-    def get_min_length(self):
-        min_length = sum(self.instructions) + len(self.instructions) - 1
-        return max(0, min_length)
+    def get_min_length(self, offset: int = 0):
+        # Minimum length of the instructions from offset onward.
+        return self.suffix_min_lengths[offset]
+
+    def get_prefix_min_length(self, count: int):
+        # Minimum length of the first count instructions.
+        return self.prefix_min_lengths[count]
 
     def __iter__(self):
         return iter(self.instructions)
 
     def __eq__(self, other):
-        if len(self) != len(other):
-            return False
-        for ins, other_ins in zip(self.instructions, other.instructions):
-            if ins != other_ins:
-                return False
-        return True
+        return self.instructions == other.instructions
+
+    def __hash__(self):
+        return hash(self.instructions)
 
     def get_next(self):
         if len(self) == 1:
             return None
-        next_instructions = RowInstructions(CellRow([]))
-        next_instructions.instructions = self.instructions[1:]
-        return next_instructions
+        return self.from_list(self.instructions[1:])
 
     @classmethod
     def from_list(cls, instructions: List[int]):
-        row_instructions = RowInstructions(CellRow([]))
-        for instruction in instructions:
-            row_instructions.instructions.append(instruction)
+        row_instructions = cls.__new__(cls)
+        row_instructions.set_instructions_(instructions)
         return row_instructions
 
     def reverse(self):
-        reversed_instructions = self.instructions.copy()
-        reversed_instructions.reverse()
-        return self.from_list(reversed_instructions)
+        # Cached, the reverse of the reverse is this object.
+        if self.reversed is None:
+            self.reversed = self.from_list(self.instructions[::-1])
+            self.reversed.reversed = self
+        return self.reversed
 
     @classmethod
     def is_row_solved(cls, row: CellRow, ins):
-        return RowInstructions(row) == ins
\ No newline at end of file
+        return cls.count_fills_(row) == ins.instructions
@@ -0,0 +1,131 @@
+import argparse
+import os
+import sys
+from multiprocessing import Pool
+from typing import List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from game.board.image_utils import array_to_image, common_dir, output_name
+
+# 4x4 Bayer matrix, scaled to thresholds in 0-255, for ordered dithering.
+BAYER_THRESHOLDS = (np.array([[0, 8, 2, 10],
+                              [12, 4, 14, 6],
+                              [3, 11, 1, 9],
+                              [15, 7, 13, 5]]) + 0.5) * 16
+NEIGHBOURS_KERNEL = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=np.float32)
+
+
+class PreprocessOptions(NamedTuple):
+    # Target (columns, rows), or None to keep the image's size.
+    size: Optional[Tuple[int, int]] = None
+    # Pixels up to the threshold are filled. None picks the threshold with Otsu's method.
+    threshold: Optional[int] = 200
+    # Ordered dithering instead of a single threshold, keeps the shades of greyscale images.
+    dither: bool = False
+    # Flips pixels that have no neighbour of the same color, each of them makes the puzzle harder to solve.
+    denoise: bool = False
+
+
+def load_grayscale(image_path: str):
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        raise ValueError('Cannot read image {}'.format(image_path))
+    return image
+
+
+def resize(image: np.ndarray, size: Tuple[int, int]):
+    # Area interpolation averages the pixels that are merged, which keeps thin lines visible when shrinking.
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def binarize(image: np.ndarray, threshold: Optional[int] = 200):
+    # Returns the filled (dark) pixels.
+    if threshold is None:
+        threshold, _ = cv2.threshold(image, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return image <= threshold
+
+
+def dither(image: np.ndarray):
+    rows, columns = image.shape
+    thresholds = np.tile(BAYER_THRESHOLDS, (rows // 4 + 1, columns // 4 + 1))[:rows, :columns]
+    return image < thresholds
+
+
+def count_neighbours(filled: np.ndarray):
+    # Filled pixels among the 8 neighbours of every pixel, pixels outside the image count as not filled.
+    return cv2.filter2D(filled.astype(np.float32), -1, NEIGHBOURS_KERNEL, borderType=cv2.BORDER_CONSTANT)
+
+
+def remove_isolated_pixels(filled: np.ndarray):
+    isolated_filled = filled & (count_neighbours(filled) == 0)
+    isolated_empty = ~filled & (count_neighbours(~filled) == 0)
+    return filled ^ (isolated_filled | isolated_empty)
+
+
+def preprocess(image: np.ndarray, options: PreprocessOptions = PreprocessOptions()):
+    # Greyscale image to the filled pixels of the board.
+    if options.size is not None:
+        image = resize(image, options.size)
+    filled = dither(image) if options.dither else binarize(image, options.threshold)
+    if options.denoise:
+        filled = remove_isolated_pixels(filled)
+    return filled
+
+
+def preprocess_image(image_path: str, options: PreprocessOptions = PreprocessOptions()):
+    return preprocess(load_grayscale(image_path), options)
+
+
+def preprocess_file_(args: Tuple[str, str, PreprocessOptions]):
+    image_path, output_path, options = args
+    array_to_image(preprocess_image(image_path, options), output_path)
+    return output_path
+
+
+def preprocess_files(image_paths: List[str], output_dir: str, options: PreprocessOptions = PreprocessOptions(),
+                     processes: int = None):
+    # Writes the preprocessed images as black and white <name>.bw.png files, spread over a process pool. Returns the
+    # output paths. The names are made by output_name(), so images with the same file name in different directories
+    # do not overwrite each other.
+    os.makedirs(output_dir, exist_ok=True)
+    root = common_dir(image_paths)
+    tasks = [(image_path, os.path.join(output_dir, output_name(image_path, root) + '.bw.png'), options)
+             for image_path in image_paths]
+    if len(tasks) == 1 or processes == 1:
+        return [preprocess_file_(task) for task in tasks]
+    with Pool(processes) as pool:
+        return pool.map(preprocess_file_, tasks)
+
+
+def parse_size(size: str):
+    columns, rows = size.lower().split('x')
+    return int(columns), int(rows)
+
+
+def parse_args(args: List[str] = None):
+    parser = argparse.ArgumentParser(description='Turn images into black and white puzzle images.')
+    parser.add_argument('images', nargs='+')
+    parser.add_argument('-o', '--output-dir', default='.')
+    parser.add_argument('--size', type=parse_size, default=None, help='target size, as <columns>x<rows>')
+    binarization = parser.add_mutually_exclusive_group()
+    binarization.add_argument('--threshold', type=int, default=200, help='pixels up to it are filled')
+    binarization.add_argument('--otsu', action='store_true', help='pick the threshold with Otsu\'s method')
+    binarization.add_argument('--dither', action='store_true', help='ordered dithering')
+    parser.add_argument('--denoise', action='store_true', help='remove isolated pixels')
+    parser.add_argument('-p', '--processes', type=int, default=None)
+    return parser.parse_args(args)
+
+
+def main(args: List[str] = None):
+    options = parse_args(args)
+    preprocess_options = PreprocessOptions(options.size, None if options.otsu else options.threshold,
+                                           options.dither, options.denoise)
+    for output_path in preprocess_files(options.images, options.output_dir, preprocess_options, options.processes):
+        print(output_path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,5 @@
+import os
+import re
 from typing import List
 
 from PIL import Image as im
@@ -6,10 +8,29 @@ import numpy as np
 from game.board.cell import CellState
 
 
-def image_to_array(image_path: str):
+def image_to_bool_array(image_path: str):
+    # Filled (dark) pixels are True.
     image_file = im.open(image_path)
-    bool_matrix = np.invert(np.array(image_file.convert('1'))).tolist()
-    return bool_to_state_matrix(bool_matrix)
+    return np.invert(np.array(image_file.convert('1')))
+
+
+def image_to_array(image_path: str):
+    return bool_to_state_matrix(image_to_bool_array(image_path).tolist())
+
+
+def run_lengths(bool_array: np.ndarray):
+    # Lengths of the runs of True in every row of the array, computed without going over the cells in Python.
+    rows, columns = bool_array.shape
+    padded = np.zeros((rows, columns + 2), dtype=np.int8)
+    padded[:, 1:-1] = bool_array
+    edges = np.diff(padded, axis=1)
+    # Every run starts at a +1 edge and ends at the next -1 edge of the same row, and nonzero() lists both in row
+    # major order, so the starts and ends pair up.
+    start_rows, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    lengths = (ends - starts).tolist()
+    bounds = np.searchsorted(start_rows, np.arange(rows + 1)).tolist()
+    return [lengths[bounds[row]:bounds[row + 1]] for row in range(rows)]
 
 
 def bool_to_state_matrix(bool_matrix: List[List[bool]]):
@@ -24,3 +45,19 @@ def array_to_image(array, image_path: str):
     data_bytes = np.packbits(data, axis=1)
     image = im.frombytes(mode='1', size=data.shape[::-1], data=data_bytes)
     image.save(image_path)
+
+
+def common_dir(paths: List[str]):
+    # The deepest directory that holds all the paths, for naming their outputs with output_name().
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths]) if paths else ''
+
+
+def output_name(path: str, root: str, name: str = None):
+    # Named after the file's path relative to the inputs' common directory, and the puzzle's name in a multi puzzle
+    # file, so inputs with the same name (1.ins and 1.png, the same name in two directories, or the same puzzle name in
+    # two files) get outputs of their own. Every part keeps only letters, digits, '.', '-' and '_', and the parts are
+    # joined with '__'.
+    parts = os.path.relpath(os.path.abspath(path), root).split(os.sep)
+    if name is not None:
+        parts.append(name)
+    return '__'.join(re.sub(r'[^\w.-]+', '_', part) for part in parts)
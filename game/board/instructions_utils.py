@@ -1,3 +1,6 @@
+import gzip
+from typing import Iterable, List, Tuple
+
 from game.board.cell import RowInstructions
 
 
@@ -24,3 +27,90 @@ def instructions_from_file(file_path: str):
     for column in column_instructions_as_int:
         column_instructions.append(RowInstructions.from_list(column))
     return row_instructions, column_instructions
+
+
+# Multi puzzle files hold any number of puzzles, each one in the .ins layout between a PUZZLE header and an END line:
+#
+#   PUZZLE <name>
+#   <one line of instructions per row>
+#   COL
+#   <one line of instructions per column>
+#   END
+#
+# An empty line of instructions is written as 0, so a blank line inside a puzzle is an error. # comments are ignored
+# anywhere, and blank lines between puzzles. Files ending with .gz are gzip compressed.
+PUZZLE_EXTENSIONS = ('.puzzles', '.puzzles.gz')
+PUZZLE_HEADER = 'PUZZLE'
+COLUMNS_HEADER = 'COL'
+PUZZLE_END = 'END'
+
+
+def is_puzzle_file(file_path: str):
+    return file_path.lower().endswith(PUZZLE_EXTENSIONS)
+
+
+def open_puzzle_file(file_path: str, mode: str = 'r'):
+    if file_path.lower().endswith('.gz'):
+        return gzip.open(file_path, mode + 't')
+    return open(file_path, mode)
+
+
+def instructions_line(instructions: Iterable[int]):
+    return ' '.join(str(item) for item in instructions) or '0'
+
+
+def read_puzzles(file_path: str):
+    # Lazily yields (name, row instructions, column instructions) for every puzzle of a multi puzzle file, so only one
+    # puzzle is held in memory at a time.
+    with open_puzzle_file(file_path) as fh:
+        name = None
+        rows, columns = [], []
+        current = None
+        for line_number, line in enumerate(fh, 1):
+            line = line.strip()
+            if line.startswith('#'):
+                continue
+            if name is None:
+                if not line:
+                    continue
+                if not line.startswith(PUZZLE_HEADER):
+                    raise ValueError('{}:{}: expected {}'.format(file_path, line_number, PUZZLE_HEADER))
+                name = line[len(PUZZLE_HEADER):].strip()
+                rows, columns = [], []
+                current = rows
+            elif line == COLUMNS_HEADER:
+                current = columns
+            elif line == PUZZLE_END:
+                if current is not columns:
+                    raise ValueError('{}:{}: puzzle {} has no {} section'.format(file_path, line_number, name,
+                                                                                 COLUMNS_HEADER))
+                yield name, rows, columns
+                name = None
+            elif not line:
+                raise ValueError('{}:{}: blank line in puzzle {}, an empty line of instructions is written as 0'.format(
+                    file_path, line_number, name))
+            else:
+                try:
+                    instructions = line_to_arr(line)
+                except ValueError:
+                    raise ValueError('{}:{}: bad instructions {!r} in puzzle {}'.format(file_path, line_number, line,
+                                                                                       name))
+                current.append(RowInstructions.from_list([] if instructions == [0] else instructions))
+        if name is not None:
+            raise ValueError('{}: puzzle {} has no {} line'.format(file_path, name, PUZZLE_END))
+
+
+def write_puzzles(file_path: str, puzzles: Iterable[Tuple[str, List[RowInstructions], List[RowInstructions]]]):
+    # Writes (name, row instructions, column instructions) puzzles as they come, and returns how many were written.
+    count = 0
+    with open_puzzle_file(file_path, 'w') as fh:
+        for name, row_instructions, column_instructions in puzzles:
+            fh.write('{} {}\n'.format(PUZZLE_HEADER, name))
+            for instructions in row_instructions:
+                fh.write(instructions_line(instructions) + '\n')
+            fh.write(COLUMNS_HEADER + '\n')
+            for instructions in column_instructions:
+                fh.write(instructions_line(instructions) + '\n')
+            fh.write(PUZZLE_END + '\n')
+            count += 1
+    return count
@@ -0,0 +1,173 @@
+from typing import List
+
+import numpy as np
+
+from game.board.board import CellTable
+from game.board.cell import CellState, Location, CellRow, STATE_CODES, CODE_STATES, UNSET_CODE, FILL_CODE
+from game.board.image_utils import array_to_image
+
+
+# Proxy for a single cell of a PackedCellTable, reads and writes go straight to the table's array.
+class PackedCell:
+    __slots__ = ('line', 'index')
+
+    def __init__(self, line: 'PackedCellRow', index: int):
+        self.line = line
+        self.index = index
+
+    @property
+    def code(self):
+        return int(self.line.states[self.index])
+
+    @property
+    def state(self):
+        return CODE_STATES[self.line.states[self.index]]
+
+    def get_state(self):
+        return self.state
+
+    def get_code(self):
+        return self.code
+
+    def get_location(self):
+        return self.line.get_location(self.index)
+
+    def set_state(self, state: CellState):
+        self.line.set_state(self.index, state)
+
+    def to_bool(self):
+        return self.state.value
+
+    def __str__(self):
+        return str(self.state)
+
+    def __eq__(self, other):
+        return self.code == other.code
+
+
+# Row or column of a PackedCellTable, backed by a view of the table's array (no copy is made).
+# start and step locate the view's cells in the flattened table, so changes can be reported with their location.
+class PackedCellRow(CellRow):
+    def __init__(self, table: 'PackedCellTable', states: np.ndarray, start: int, step: int):
+        self.table = table
+        self.states = states
+        self.start = start
+        self.step = step
+
+    @property
+    def cells(self):
+        return self.get_cells()
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, _, step = key.indices(len(self.states))
+            return PackedCellRow(self.table, self.states[key], self.start + start * self.step, self.step * step)
+        if not -len(self.states) <= key < len(self.states):
+            raise IndexError(key)
+        return PackedCell(self, key)
+
+    def __setitem__(self, key, value):
+        if key in range(len(self)):
+            self.set_state(key, value.state)
+
+    def __len__(self):
+        return len(self.states)
+
+    def __iter__(self):
+        return (PackedCell(self, index) for index in range(len(self.states)))
+
+    def get_location(self, index: int):
+        if index < 0:
+            index += len(self.states)
+        return Location(*divmod(self.start + index * self.step, self.table.columns))
+
+    def set_state(self, index: int, state: CellState):
+        old_code = self.states[index]
+        self.states[index] = STATE_CODES[state]
+        if index < 0:
+            index += len(self.states)
+        self.table.changes.flat[self.start + index * self.step] += 1
+        if self.table.observer is not None:
+            self.table.cell_changed_(self.get_location(index), CODE_STATES[old_code], state)
+
+    def is_fully_set(self):
+        # A NumPy reduction costs more than the search through the bytes on lines this short.
+        return UNSET_CODE not in self.states.tobytes()
+
+    def get_cells(self):
+        return list(self)
+
+    def get_codes(self):
+        return self.states.tolist()
+
+    def encode(self):
+        return self.states.tobytes()
+
+    def reverse(self):
+        return PackedCellRow(self.table, self.states[::-1], self.start + (len(self.states) - 1) * self.step,
+                             -self.step)
+
+
+# CellTable backend that keeps the grid as a single int8 array of state codes instead of Cell objects.
+class PackedCellTable(CellTable):
+    def __init__(self, rows: int = None, columns=None, array: List[List[CellState]] = None):
+        self.observer = None
+        if rows:
+            self.rows = rows
+            if columns:
+                self.columns = columns
+            else:
+                self.columns = rows
+            self.states = np.full((self.rows, self.columns), UNSET_CODE, dtype=np.int8)
+        elif array:
+            self.rows = len(array)
+            self.columns = len(array[0])
+            self.states = np.array([[STATE_CODES[state] for state in row] for row in array], dtype=np.int8)
+        # Changes of every cell.
+        self.changes = np.zeros((self.rows, self.columns), dtype=np.uint32)
+
+    @property
+    def table(self):
+        return [self.get_row(row) for row in range(self.rows)]
+
+    def to_image(self, image_path: str):
+        array_to_image(self.states == FILL_CODE, image_path)
+
+    def get_cell_state(self, location: Location):
+        self.assert_location(location)
+        return CODE_STATES[self.states[location.row, location.column]]
+
+    def set_cell_state(self, location: Location, state: CellState):
+        self.assert_location(location)
+        old_code = self.states[location.row, location.column]
+        self.states[location.row, location.column] = STATE_CODES[state]
+        self.changes[location.row, location.column] += 1
+        self.cell_changed_(location, CODE_STATES[old_code], state)
+
+    def restore_cell_state(self, location: Location, state: CellState):
+        old_code = self.states[location.row, location.column]
+        self.states[location.row, location.column] = STATE_CODES[state]
+        self.cell_changed_(location, CODE_STATES[old_code], state)
+
+    def get_row(self, row: int):
+        return PackedCellRow(self, self.states[row], row * self.columns, 1)
+
+    def get_column(self, column: int):
+        return PackedCellRow(self, self.states[:, column], column, self.columns)
+
+    def __eq__(self, other):
+        if isinstance(other, PackedCellTable):
+            return np.array_equal(self.states, other.states)
+        return super().__eq__(other)
+
+    def encode(self):
+        return self.states.tobytes()
+
+    def get_steps(self):
+        return int(self.changes.sum())
+
+    def get_cell_steps(self):
+        return self.changes.ravel().tolist()
+
+    def set_cell_steps(self, steps: List[int]):
+        self.changes = np.array(steps, dtype=np.uint32).reshape(self.rows, self.columns)
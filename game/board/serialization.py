@@ -0,0 +1,215 @@
+import os
+import struct
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+# Binary board format, all numbers little endian:
+#
+#   header      magic, format version, flags, rows, columns
+#   clues       number of clues of every row and then every column (uint16 each), followed by all the clues (uint16)
+#   grid        state codes packed 2 bits per cell, 4 cells per byte, row after row
+#   solution    (if HAS_SOLUTION) the solution's state codes, packed the same way
+#   steps       (if HAS_STEPS) the board's step counter (uint64), followed by the changes of every cell (uint32)
+MAGIC = b'NONO'
+VERSION = 1
+HAS_SOLUTION = 1
+HAS_STEPS = 2
+HEADER = struct.Struct('<4sBBII')
+BOARD_STEPS = struct.Struct('<Q')
+CLUE_TYPE = np.dtype('<u2')
+CELL_STEPS_TYPE = np.dtype('<u4')
+
+
+class BoardData(NamedTuple):
+    row_instructions: List[List[int]]
+    column_instructions: List[List[int]]
+    codes: bytes
+    solution_codes: Optional[bytes] = None
+    board_steps: Optional[int] = None
+    cell_steps: Optional[List[int]] = None
+
+
+def packed_size(cells: int):
+    return (cells + 3) // 4
+
+
+def pack_codes(codes: bytes):
+    # Packs state codes (0-2, one per byte) into 2 bits each.
+    padded = np.zeros(4 * packed_size(len(codes)), dtype=np.uint8)
+    padded[:len(codes)] = np.frombuffer(codes, dtype=np.uint8)
+    quads = padded.reshape(-1, 4)
+    return (quads[:, 0] | quads[:, 1] << 2 | quads[:, 2] << 4 | quads[:, 3] << 6).astype(np.uint8).tobytes()
+
+
+def unpack_codes(data, cells: int, offset: int = 0):
+    packed = np.frombuffer(data, dtype=np.uint8, count=packed_size(cells), offset=offset)
+    quads = np.stack([packed & 3, packed >> 2 & 3, packed >> 4 & 3, packed >> 6 & 3], axis=1)
+    return quads.reshape(-1)[:cells].tobytes()
+
+
+def to_bytes(board_data: BoardData):
+    rows, columns = len(board_data.row_instructions), len(board_data.column_instructions)
+    cells = rows * columns
+    lines = board_data.row_instructions + board_data.column_instructions
+    flags = (HAS_SOLUTION if board_data.solution_codes is not None else 0) | \
+        (HAS_STEPS if board_data.cell_steps is not None else 0)
+    parts = [HEADER.pack(MAGIC, VERSION, flags, rows, columns),
+             np.array([len(line) for line in lines], dtype=CLUE_TYPE).tobytes(),
+             np.array([clue for line in lines for clue in line], dtype=CLUE_TYPE).tobytes(),
+             pack_codes(board_data.codes)]
+    if board_data.solution_codes is not None:
+        parts.append(pack_codes(board_data.solution_codes))
+    if board_data.cell_steps is not None:
+        parts.append(BOARD_STEPS.pack(board_data.board_steps or 0))
+        parts.append(np.asarray(board_data.cell_steps, dtype=CELL_STEPS_TYPE).reshape(-1)[:cells].tobytes())
+    return b''.join(parts)
+
+
+def from_bytes(data):
+    # Reads any buffer (bytes, memoryview, mmap) without copying more than the decoded parts.
+    if len(data) < HEADER.size:
+        raise ValueError('Not a board: too short')
+    magic, version, flags, rows, columns = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not a board: bad magic {!r}'.format(magic))
+    if version != VERSION:
+        raise ValueError('Unsupported board format version {}'.format(version))
+    cells = rows * columns
+    offset = HEADER.size
+    try:
+        counts = np.frombuffer(data, dtype=CLUE_TYPE, count=rows + columns, offset=offset)
+        offset += counts.nbytes
+        clues = np.frombuffer(data, dtype=CLUE_TYPE, count=int(counts.sum()), offset=offset).tolist()
+        offset += CLUE_TYPE.itemsize * len(clues)
+        lines = []
+        start = 0
+        for count in counts.tolist():
+            lines.append(clues[start:start + count])
+            start += count
+        codes = unpack_codes(data, cells, offset)
+        offset += packed_size(cells)
+        solution_codes = None
+        if flags & HAS_SOLUTION:
+            solution_codes = unpack_codes(data, cells, offset)
+            offset += packed_size(cells)
+        board_steps = cell_steps = None
+        if flags & HAS_STEPS:
+            board_steps, = BOARD_STEPS.unpack_from(data, offset)
+            offset += BOARD_STEPS.size
+            cell_steps = np.frombuffer(data, dtype=CELL_STEPS_TYPE, count=cells, offset=offset).tolist()
+    except (ValueError, struct.error) as e:
+        raise ValueError('Truncated board: {}'.format(e))
+    return BoardData(lines[:rows], lines[rows:], codes, solution_codes, board_steps, cell_steps)
+
+
+# Search checkpoint: the board (in the format above) and the state of the search on it. Every decision opens a level,
+# which starts at its trail mark in the trail (the cells set since the first decision, oldest first), so the board can
+# be rebuilt level by level. The line versions and the probing locator's cached probes (which are checked against the
+# versions) are saved too, so a resumed search makes the same steps as an uninterrupted one.
+#
+#   header      magic, format version, guesses (uint64), decisions, trail length, probes, board size (uint32 each)
+#   board       to_bytes() of the board
+#   versions    the last version given, and the version of every row and then every column (uint64 each)
+#   decisions   row, column (uint32), state code, flipped (uint8), trail mark (uint32), for every decision
+#   trail       row, column (uint32), old state code (uint8), row version, column version (uint64), for every entry
+#   probes      row, column (uint32), state code, consistent (uint8), assignments, lines (uint32), then the row, column
+#               (uint32) and state code (uint8) of every assignment, and the version of every line read (uint64)
+CHECKPOINT_MAGIC = b'NCKP'
+CHECKPOINT_VERSION = 2
+CHECKPOINT_HEADER = struct.Struct('<4sBQIIII')
+DECISION = struct.Struct('<IIBBI')
+TRAIL_ENTRY = struct.Struct('<IIBQQ')
+PROBE = struct.Struct('<IIBBII')
+ASSIGNMENT = struct.Struct('<IIB')
+VERSION_TYPE = np.dtype('<u8')
+
+
+class SearchState(NamedTuple):
+    guesses: int
+    # (row, column, state code, flipped) of every decision, and the trail mark of its level.
+    decisions: List[Tuple[int, int, int, bool]]
+    levels: List[int]
+    # (row, column, old state code, row version, column version) of every trail entry.
+    trail: List[Tuple[int, int, int, int, int]]
+    last_version: int
+    row_versions: List[int]
+    column_versions: List[int]
+    # (row, column, state code, consistent, [(row, column, state code) of every assignment], line versions).
+    probes: List[Tuple[int, int, int, bool, List[Tuple[int, int, int]], List[int]]]
+
+
+class Checkpoint(NamedTuple):
+    board_data: BoardData
+    search: SearchState
+
+
+def checkpoint_to_bytes(board_bytes: bytes, search: SearchState):
+    if len(search.levels) != len(search.decisions):
+        raise ValueError('Every decision needs a level: {} decisions, {} levels'.format(
+            len(search.decisions), len(search.levels)))
+    parts = [CHECKPOINT_HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, search.guesses, len(search.decisions),
+                                    len(search.trail), len(search.probes), len(board_bytes)),
+             board_bytes,
+             np.array([search.last_version] + list(search.row_versions) + list(search.column_versions),
+                      dtype=VERSION_TYPE).tobytes()]
+    parts.extend(DECISION.pack(row, column, code, flipped, mark)
+                 for (row, column, code, flipped), mark in zip(search.decisions, search.levels))
+    parts.extend(TRAIL_ENTRY.pack(*entry) for entry in search.trail)
+    for row, column, code, consistent, assignments, versions in search.probes:
+        parts.append(PROBE.pack(row, column, code, consistent, len(assignments), len(versions)))
+        parts.extend(ASSIGNMENT.pack(*assignment) for assignment in assignments)
+        parts.append(np.array(versions, dtype=VERSION_TYPE).tobytes())
+    return b''.join(parts)
+
+
+def unpack_records_(record: struct.Struct, data, count: int, offset: int):
+    end = offset + count * record.size
+    if len(data) < end:
+        raise ValueError('Truncated checkpoint: expected {} more bytes'.format(end - len(data)))
+    return list(record.iter_unpack(data[offset:end])), end
+
+
+def unpack_versions_(data, count: int, offset: int):
+    return np.frombuffer(data, dtype=VERSION_TYPE, count=count, offset=offset).tolist(), \
+        offset + count * VERSION_TYPE.itemsize
+
+
+def checkpoint_from_bytes(data):
+    try:
+        magic, version, guesses, decision_count, trail_length, probe_count, board_size = \
+            CHECKPOINT_HEADER.unpack_from(data)
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError('Not a checkpoint: bad magic {!r}'.format(magic))
+        if version != CHECKPOINT_VERSION:
+            raise ValueError('Unsupported checkpoint format version {}'.format(version))
+        offset = CHECKPOINT_HEADER.size + board_size
+        board_data = from_bytes(data[CHECKPOINT_HEADER.size:offset])
+        rows, columns = len(board_data.row_instructions), len(board_data.column_instructions)
+        versions, offset = unpack_versions_(data, 1 + rows + columns, offset)
+        frames, offset = unpack_records_(DECISION, data, decision_count, offset)
+        trail, offset = unpack_records_(TRAIL_ENTRY, data, trail_length, offset)
+        probes = []
+        for _ in range(probe_count):
+            (row, column, code, consistent, assignment_count, line_count), = \
+                PROBE.iter_unpack(data[offset:offset + PROBE.size])
+            assignments, offset = unpack_records_(ASSIGNMENT, data, assignment_count, offset + PROBE.size)
+            line_versions, offset = unpack_versions_(data, line_count, offset)
+            probes.append((row, column, code, bool(consistent), assignments, line_versions))
+    except struct.error as e:
+        raise ValueError('Truncated checkpoint: {}'.format(e))
+    decisions = [(row, column, code, bool(flipped)) for row, column, code, flipped, _ in frames]
+    levels = [mark for _, _, _, _, mark in frames]
+    search = SearchState(guesses, decisions, levels, trail, versions[0], versions[1:1 + rows], versions[1 + rows:],
+                         probes)
+    return Checkpoint(board_data, search)
+
+
+def write_atomically(file_path: str, data: bytes):
+    # Written to a temporary file first, so an interrupted write never leaves a broken file behind.
+    temp_path = file_path + '.tmp'
+    with open(temp_path, 'wb') as fh:
+        fh.write(data)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(temp_path, file_path)
@@ -1,15 +1,22 @@
+from time import perf_counter
 from typing import List
 
 from game.board.board import Board
-from game.board.cell import CellState, Location, RowInstructions, CellRow
+from game.board.cell import CellState, Location, RowInstructions
 from game.solver.guess_solver import GuessSolver
+from game.solver.instrumentation import PROPAGATIONS, CONTRADICTIONS, PROPAGATION_TIME, PROPAGATED_EVENT
 from game.solver.solvertools.guesslocator import Guess, ByOrderGuessLocator, MostInfoGuessLocator
-from game.solver.solvertools.solver_tools import RowInfoAdder, CellInfoToAdd
+from game.solver.solvertools.propagation import LinePropagator
+from game.solver.solvertools.solver_tools import CellInfoToAdd
 
 
 class AnalyzeThenGuessSolver(GuessSolver):
-    def __init__(self, board: Board, verbose: bool = False, wait_time: float = 0.0):
+    def __init__(self, board: Board, verbose: bool = False, wait_time: float = 0.0, use_line_solver: bool = False):
         super().__init__(board, verbose, wait_time)
+        # Off by default, which keeps the RowAnalyzer. The exact line solver (and its process wide LineSolveCache) is
+        # opt-in.
+        self.use_line_solver = use_line_solver
+        self.propagator = LinePropagator(board, use_line_solver, self.metrics, self.check_budget_)
 
     def is_row_solved_(self, row: int):
         return RowInstructions.is_row_solved(self.board.get_row(row), self.board.get_row_instructions(row))
@@ -17,34 +24,29 @@ class AnalyzeThenGuessSolver(GuessSolver):
     def is_column_solved_(self, column: int):
         return RowInstructions.is_row_solved(self.board.get_column(column), self.board.get_column_instructions(column))
 
-    def get_row_info_(self, row: CellRow, instructions: RowInstructions):
-        row_info = RowInfoAdder(row, instructions).add_info()
-        if row_info:
-            self.print_state()
-            for info in row_info:
-                info.set_cell()
-        return row_info
-
-    def add_row_info_(self, row: CellRow, instructions: RowInstructions, info_to_add: List[CellInfoToAdd]):
-        if not row.is_fully_set():
-            row_info = self.get_row_info_(row, instructions)
-            if row_info:
-                info_to_add.extend(row_info)
-                return True
-        return False
+    def run_propagator_(self, info_to_add: List[CellInfoToAdd] = None):
+        # Drains the propagator's queue, and records the pass in the metrics.
+        start = perf_counter()
+        consistent = self.propagator.propagate(info_to_add)
+        self.metrics.add_time(PROPAGATION_TIME, perf_counter() - start)
+        self.metrics.count(PROPAGATIONS)
+        if not consistent:
+            self.metrics.count(CONTRADICTIONS)
+        if self.listeners:
+            self.emit_(PROPAGATED_EVENT, consistent=consistent)
+        return consistent
+
+    def abandon_search_(self):
+        super().abandon_search_()
+        self.propagator.clear()
+
+    def propagate_(self, info_to_add: List[CellInfoToAdd] = None):
+        self.propagator.push_all()
+        return self.run_propagator_(info_to_add)
 
     def add_info(self):
-        info_added = True
         info_to_add = []
-        while not self.board.is_board_solved() and info_added:
-            info_added = False
-            for row in range(self.rows):
-                if self.add_row_info_(self.board.get_row(row), self.board.get_row_instructions(row), info_to_add):
-                    info_added = True
-            for column in range(self.columns):
-                if self.add_row_info_(self.board.get_column(column), self.board.get_column_instructions(column),
-                                      info_to_add):
-                    info_added = True
+        self.propagate_(info_to_add)
         return info_to_add
 
     def print_state(self, guess: Guess = None):
@@ -55,15 +57,13 @@ class AnalyzeThenGuessSolver(GuessSolver):
                 print('Guessed: {}'.format(guess.location), flush=True)
 
     def solve_(self, guess: Guess = Guess(Location(-1, -1), CellState.FILL)):
-        added_info = self.add_info()
+        # Changes made here are undone by the guess that led to this call, through the board's trail.
+        if not self.propagate_():
+            return False
+        self.print_state()
         if self.board.is_board_solved():
             return True
-        if self.guess_(self.next_guess_location(guess)):
-            return True
-        if guess.location != Location(-1, -1):
-            for info in added_info:
-                info.unset_cell()
-        return False
+        return self.guess_(self.next_guess_location(guess))
 
     def solve(self):
         self.start_count_time_()
@@ -73,27 +73,20 @@ class AnalyzeThenGuessSolver(GuessSolver):
 
 
 class AnalyzeSkipUnchangedInfoGuessSolver(AnalyzeThenGuessSolver):
-    def add_info(self):
-        info_to_add = []
-        rows_to_check = list(range(self.rows))
-        columns_to_check = list(range(self.columns))
-        while not self.board.is_board_solved() and (rows_to_check or columns_to_check):
-            rows_to_check = []
-            columns_to_check = []
-            for row in range(self.rows):
-                info = (self.get_row_info_(self.board.get_row(row), self.board.get_row_instructions(row)))
-                if info:
-                    info_to_add.extend(info)
-                    columns_to_check.extend([cell_info.cell.get_location().column for cell_info in info])
-            for column in range(self.columns):
-                info = self.get_row_info_(self.board.get_column(column), self.board.get_column_instructions(column))
-                if info:
-                    info_to_add.extend(info)
-                    rows_to_check.extend([cell_info.cell.get_location().row for cell_info in info])
-        return info_to_add
+    def __init__(self, board: Board, verbose: bool = False, wait_time: float = 0.0, use_line_solver: bool = False):
+        super().__init__(board, verbose, wait_time, use_line_solver)
+        self.propagator.push_all()
+
+    def attempt_guess_and_solve_(self, guess: Guess):
+        # Only the row and column of the guessed cell changed, the rest of the board is already at a fixpoint.
+        self.propagator.push_location(guess.location)
+        return super().attempt_guess_and_solve_(guess)
+
+    def propagate_(self, info_to_add: List[CellInfoToAdd] = None):
+        return self.run_propagator_(info_to_add)
 
 
 class AnalyzeThenBestInfoGuessSolver(AnalyzeThenGuessSolver):
-    def __init__(self, board: Board):
-        super().__init__(board)
-        self.guess_locator = MostInfoGuessLocator(board)
+    def __init__(self, board: Board, use_line_solver: bool = False):
+        super().__init__(board, use_line_solver=use_line_solver)
+        self.guess_locator = MostInfoGuessLocator(board, use_line_solver, self.metrics, self.check_budget_)
@@ -0,0 +1,52 @@
+from typing import NamedTuple, Optional
+
+from game.solver.instrumentation import SolveMetrics
+
+# The limit that ran out.
+TIME_LIMIT = 'time'
+GUESS_LIMIT = 'guesses'
+PROPAGATION_LIMIT = 'propagation_steps'
+# Solve statuses.
+SOLVED = 'solved'
+UNSOLVED = 'unsolved'
+GAVE_UP = 'gave-up'
+
+
+# Limits of a single solve, None means no limit. The solvers check them on every search step, and every few line
+# solves inside propagations and guess locations.
+class Budget(NamedTuple):
+    max_seconds: Optional[float] = None
+    # The solver gives up instead of making guess max_guesses + 1.
+    max_guesses: Optional[int] = None
+    # Line solves, by the propagator and by the info adders.
+    max_propagation_steps: Optional[int] = None
+
+    def get_exceeded(self, seconds: float, guesses: int, propagation_steps: int):
+        # Returns the limit that ran out, or None.
+        if self.max_seconds is not None and seconds >= self.max_seconds:
+            return TIME_LIMIT
+        if self.max_guesses is not None and guesses >= self.max_guesses:
+            return GUESS_LIMIT
+        if self.max_propagation_steps is not None and propagation_steps > self.max_propagation_steps:
+            return PROPAGATION_LIMIT
+        return None
+
+
+# Raised by the search when the budget runs out, it unwinds the recursive solvers from any depth.
+class BudgetExceeded(Exception):
+    def __init__(self, limit: str):
+        super().__init__('The {} budget ran out'.format(limit))
+        self.limit = limit
+
+
+class SolveResult(NamedTuple):
+    status: str
+    # The limit that ran out, when the solver gave up.
+    limit: Optional[str]
+    # Cell codes of the board where the solve stopped (see Board.encode_states). When the solver gave up, only the
+    # cells deduced before the first guess are set.
+    codes: bytes
+    metrics: SolveMetrics
+
+    def gave_up(self):
+        return self.status == GAVE_UP
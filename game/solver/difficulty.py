@@ -0,0 +1,81 @@
+from typing import NamedTuple
+
+from game.board.board import Board
+from game.board.cell import Location, CellState
+from game.solver.instrumentation import BACKTRACKS
+from game.solver.iterative_solver import IterativeGuessSolver
+from game.solver.solvertools.guesslocator import Guess, ProbingGuessLocator
+
+LINE_SOLVABLE = 'line-solvable'
+PROBING_SOLVABLE = 'probing-solvable'
+NEEDS_SEARCH = 'needs-search'
+UNSOLVABLE = 'unsolvable'
+
+
+class DifficultyGrade(NamedTuple):
+    grade: str
+    # Line propagation from the empty board.
+    propagation_rounds: int
+    lines_solved: int
+    unset_after_propagation: int
+    # Probing (trying both states of a cell and keeping what holds in both).
+    probes: int
+    deductions: int
+    # Search, all zero unless the board needs it.
+    guesses: int
+    backtracks: int
+    max_depth: int
+    milli_seconds: float
+
+    def get_branching_factor(self):
+        # Branches searched per decision: 1 when every first guess was right, 2 when every decision had to be
+        # flipped.
+        return (self.guesses + self.backtracks) / self.guesses if self.guesses else 0.0
+
+
+# Grades a board by the weakest technique that solves it: line propagation alone, propagation with probing, or a
+# guess search (run with the probing locator, and only if search is set). Leaves the board solved when it can.
+class DifficultyGrader(IterativeGuessSolver):
+    def __init__(self, board: Board, use_line_solver: bool = True, search: bool = True):
+        super().__init__(board, use_line_solver=use_line_solver)
+        self.guess_locator = ProbingGuessLocator(board, use_line_solver, self.metrics, self.check_budget_)
+        self.search = search
+        self.max_depth = 0
+        # Rounds, lines solved and unset cells after the first propagation.
+        self.propagation_stats = (0, 0, board.unset_cells)
+
+    def apply_guess_(self, guess: Guess):
+        self.max_depth = max(self.max_depth, len(self.stack))
+        return super().apply_guess_(guess)
+
+    def grade_(self):
+        consistent = self.propagate_()
+        self.propagation_stats = (self.propagator.rounds, self.propagator.lines_solved, self.board.unset_cells)
+        if not consistent:
+            return UNSOLVABLE
+        if self.board.is_board_solved():
+            return LINE_SOLVABLE
+        root = Guess(Location(-1, -1), CellState.FILL)
+        guess = self.guess_locator.get_next_guess(root)
+        if self.board.is_board_solved():
+            return PROBING_SOLVABLE
+        if guess is None:
+            return UNSOLVABLE
+        if self.search and not self.continue_(root):
+            return UNSOLVABLE
+        return NEEDS_SEARCH
+
+    def grade(self):
+        self.start_count_time_()
+        grade = self.grade_()
+        self.stop_count_time_()
+        return DifficultyGrade(grade, *self.propagation_stats, self.guess_locator.probes_run,
+                               self.guess_locator.deductions, self.guesses, self.metrics.get_counter(BACKTRACKS),
+                               self.max_depth, self.duration_in_milli_seconds)
+
+    def solve(self):
+        grade = self.grade()
+        print('{} ({} propagation rounds, {} probes, {} guesses, depth {}), graded in {:.2f} milli-seconds'.format(
+            grade.grade, grade.propagation_rounds, grade.probes, grade.guesses, grade.max_depth,
+            grade.milli_seconds))
+        return grade
@@ -1,5 +1,8 @@
+from time import perf_counter
+
 from game.board.board import Board
 from game.board.cell import Location, CellState
+from game.solver.instrumentation import GUESS_LOCATION_TIME, BACKTRACKS, LINE_SOLVES, GUESS_EVENT, BACKTRACK_EVENT
 from game.solver.solver import Solver
 from game.solver.solvertools.guesslocator import Guess, ByOrderGuessLocator, MostInfoGuessLocator
 from game.solver.solvertools.solver_tools import RowAnalyzer
@@ -12,7 +15,10 @@ class GuessSolver(Solver):
 
     def next_guess_location(self, last_guess: Guess):
         if self.guess_locator:
-            return self.guess_locator.get_next_guess(last_guess)
+            start = perf_counter()
+            guess = self.guess_locator.get_next_guess(last_guess)
+            self.metrics.add_time(GUESS_LOCATION_TIME, perf_counter() - start)
+            return guess
         return None
 
     def guess_(self, guess: Guess):
@@ -21,15 +27,24 @@ class GuessSolver(Solver):
             if self.verbose:
                 print(self.board.print_game_table())
             return self.board.is_board_solved()
+        self.check_budget_()
+        level = self.board.get_level()
         if self.attempt_guess_and_solve_(guess):
             return True
+        self.board.backtrack_to(level)
+        self.metrics.count(BACKTRACKS)
+        if self.listeners:
+            self.emit_(BACKTRACK_EVENT, guess=guess.get_flipped_guess())
         if self.attempt_guess_and_solve_(guess.get_flipped_guess()):
             return True
-        self.board.set_cell_state(guess.location, CellState.UNSET)
+        self.board.backtrack_to(level)
         return False
 
     def attempt_guess_and_solve_(self, guess: Guess):
+        self.board.push_level()
         self.board.set_cell_state(guess.location, guess.state)
+        if self.listeners:
+            self.emit_(GUESS_EVENT, guess=guess)
         if self.verbose:
             print(self.board.print_game_table())
         if self.analyze_and_solve_(guess):
@@ -37,6 +52,9 @@ class GuessSolver(Solver):
         return False
 
     def analyze_and_solve_(self, guess: Guess):
+        # The row and column analyzers count as line solves.
+        self.metrics.count(LINE_SOLVES, 2)
+        self.check_budget_()
         row_analyzer = RowAnalyzer(self.board.get_row(guess.location.row),
                                    self.board.get_row_instructions(guess.location.row))
         column_analyzer = RowAnalyzer(self.board.get_column(guess.location.column),
@@ -57,4 +75,4 @@ class GuessSolver(Solver):
 class BestInfoGuessSolver(GuessSolver):
     def __init__(self, board: Board):
         super().__init__(board)
-        self.guess_locator = MostInfoGuessLocator(board)
+        self.guess_locator = MostInfoGuessLocator(board, metrics=self.metrics, poll=self.check_budget_)
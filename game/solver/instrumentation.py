@@ -0,0 +1,65 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Dict, NamedTuple, Optional
+
+# Counters.
+LINE_SOLVES = 'line_solves'
+PROPAGATIONS = 'propagations'
+CONTRADICTIONS = 'contradictions'
+BACKTRACKS = 'backtracks'
+CACHE_HITS = 'cache_hits'
+CACHE_MISSES = 'cache_misses'
+INFO_ROUNDS = 'info_rounds'
+# Timers.
+PROPAGATION_TIME = 'propagation'
+GUESS_LOCATION_TIME = 'guess_location'
+ADD_INFO_TIME = 'add_info'
+# Events, passed to the listeners with keyword arguments: guess (guess), backtrack (guess, the flipped guess),
+# propagated (consistent) and solved (solved).
+GUESS_EVENT = 'guess'
+BACKTRACK_EVENT = 'backtrack'
+PROPAGATED_EVENT = 'propagated'
+SOLVED_EVENT = 'solved'
+
+
+# Named counters and cumulative timers (in seconds).
+class Metrics:
+    def __init__(self):
+        self.counters = Counter()
+        self.timers = defaultdict(float)
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] += amount
+
+    def add_time(self, name: str, seconds: float):
+        self.timers[name] += seconds
+
+    @contextmanager
+    def timer(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.timers[name] += perf_counter() - start
+
+    def get_counter(self, name: str):
+        return self.counters[name]
+
+    def get_time(self, name: str):
+        return self.timers[name]
+
+    def clear(self):
+        self.counters.clear()
+        self.timers.clear()
+
+
+class SolveMetrics(NamedTuple):
+    solved: bool
+    milli_seconds: float
+    steps: int
+    guesses: int
+    counters: Dict[str, int]
+    timers_ms: Dict[str, float]
+    # cProfile statistics of the solve, if it was profiled.
+    profile: Optional[str] = None
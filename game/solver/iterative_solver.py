@@ -0,0 +1,197 @@
+from time import time
+from typing import NamedTuple, List, Tuple
+
+from game.board import serialization
+from game.board.board import Board, CellTable, TrailEntry
+from game.board.cell import Location, CellState, RowInstructions, STATE_CODES, CODE_STATES
+from game.solver.analyze_the_guess_solver import AnalyzeThenGuessSolver
+from game.solver.instrumentation import BACKTRACKS, GUESS_EVENT, BACKTRACK_EVENT
+from game.solver.solvertools.guesslocator import Guess, MostInfoGuessLocator, ProbingGuessLocator
+from game.solver.solvertools.parallel_guesslocator import ParallelMostInfoGuessLocator
+
+
+class SearchFrame(NamedTuple):
+    guess: Guess
+    level: int
+    flipped: bool
+
+
+# Same search as AnalyzeSkipUnchangedInfoGuessSolver, but driven by an explicit stack of decisions instead of Python
+# recursion, so the number of guessed cells is not limited by the recursion limit.
+# With a checkpoint path, the search is saved there every checkpoint_interval seconds, and can be continued with
+# resume() after the process died.
+class IterativeGuessSolver(AnalyzeThenGuessSolver):
+    def __init__(self, board: Board, verbose: bool = False, wait_time: float = 0.0, use_line_solver: bool = False,
+                 checkpoint_path: str = None, checkpoint_interval: float = 60.0):
+        super().__init__(board, verbose, wait_time, use_line_solver)
+        self.stack = []
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.last_checkpoint_time = time()
+
+    def apply_guess_(self, guess: Guess):
+        self.board.push_level()
+        self.board.set_cell_state(guess.location, guess.state)
+        if self.listeners:
+            self.emit_(GUESS_EVENT, guess=guess)
+        self.print_state(guess)
+        self.propagator.push_location(guess.location)
+        return self.run_propagator_()
+
+    def backtrack_(self):
+        # Pops decisions until one can be flipped consistently. Returns the flipped guess, or None if the search space
+        # is exhausted.
+        while self.stack:
+            frame = self.stack.pop()
+            self.board.backtrack_to(frame.level)
+            if frame.flipped:
+                continue
+            flipped_guess = frame.guess.get_flipped_guess()
+            self.stack.append(SearchFrame(flipped_guess, frame.level, True))
+            self.metrics.count(BACKTRACKS)
+            if self.listeners:
+                self.emit_(BACKTRACK_EVENT, guess=flipped_guess)
+            if self.apply_guess_(flipped_guess):
+                return flipped_guess
+        return None
+
+    def abandon_search_(self):
+        super().abandon_search_()
+        self.stack = []
+
+    def replay_(self, decisions: List[Tuple[Guess, bool]]):
+        # Applies (guess, flipped) decisions on top of the propagated board, as if the search made them.
+        for guess, flipped in decisions:
+            self.stack.append(SearchFrame(guess, self.board.get_level(), flipped))
+            if not self.apply_guess_(guess):
+                return False
+        return True
+
+    def poll_(self):
+        # Called once per search step, returning False stops the search.
+        self.check_budget_()
+        if self.checkpoint_path is not None and time() - self.last_checkpoint_time >= self.checkpoint_interval:
+            self.save_checkpoint()
+        return True
+
+    def save_checkpoint(self):
+        # Only consistent between search steps, when the board is at the fixpoint of the decisions on the stack.
+        board = self.board
+        decisions = [(frame.guess.location.row, frame.guess.location.column, STATE_CODES[frame.guess.state],
+                      frame.flipped) for frame in self.stack]
+        trail = [(entry.location.row, entry.location.column, STATE_CODES[entry.state], entry.row_version,
+                  entry.column_version) for entry in board.trail]
+        search = serialization.SearchState(self.guesses, decisions, board.levels, trail, board.last_version,
+                                           board.row_versions, board.column_versions,
+                                           self.guess_locator.get_cached_probes())
+        serialization.write_atomically(self.checkpoint_path,
+                                       serialization.checkpoint_to_bytes(board.to_bytes(with_solution=False), search))
+        self.last_checkpoint_time = time()
+
+    def start_(self, decisions: List[Tuple[Guess, bool]] = ()):
+        # Propagates the board and replays the decisions. Returns the guess to continue the search from, or None if
+        # there is nothing left to search.
+        self.stack = []
+        if not self.propagate_():
+            return None
+        if not decisions:
+            return Guess(Location(-1, -1), CellState.FILL)
+        if self.replay_(decisions):
+            return decisions[-1][0]
+        return self.backtrack_()
+
+    def restore_(self, checkpoint: serialization.Checkpoint):
+        # Rebuilds the saved search on the empty board, every decision at its own level, and returns the guess to
+        # continue the search from.
+        board_data, search = checkpoint
+        trail = [TrailEntry(Location(row, column), CODE_STATES[code], row_version, column_version)
+                 for row, column, code, row_version, column_version in search.trail]
+        self.board.restore_levels(board_data.codes, search.levels, trail, search.last_version, search.row_versions,
+                                  search.column_versions)
+        self.guess_locator.load_cached_probes(search.probes)
+        self.stack = [SearchFrame(Guess(Location(row, column), CODE_STATES[code]), level, flipped)
+                      for level, (row, column, code, flipped) in enumerate(search.decisions)]
+        self.guesses = search.guesses
+        # Restoring counted its own steps, the saved counters replace them.
+        self.board.steps = board_data.board_steps
+        self.board.game_table.set_cell_steps(board_data.cell_steps)
+        return self.stack[-1].guess if self.stack else Guess(Location(-1, -1), CellState.FILL)
+
+    def continue_(self, last_guess: Guess):
+        while not self.board.is_board_solved():
+            if not self.poll_():
+                return False
+            guess = self.next_guess_location(last_guess)
+            if guess is None and self.board.is_board_solved():
+                # The guess locator may have deduced the rest of the board by itself.
+                continue
+            if guess is not None:
+                self.add_guess_()
+                self.stack.append(SearchFrame(guess, self.board.get_level(), False))
+                if self.apply_guess_(guess):
+                    last_guess = guess
+                    continue
+            last_guess = self.backtrack_()
+            if last_guess is None:
+                return False
+        return True
+
+    def search_(self, decisions: List[Tuple[Guess, bool]] = ()):
+        last_guess = self.start_(decisions)
+        return last_guess is not None and self.continue_(last_guess)
+
+    @classmethod
+    def resume(cls, checkpoint_path: str, table_type: type = CellTable, **kwargs):
+        # Continues the search saved in the checkpoint, and keeps checkpointing to the same file. Extra arguments
+        # are passed to the solver's constructor. Returns the solver.
+        with open(checkpoint_path, 'rb') as fh:
+            checkpoint = serialization.checkpoint_from_bytes(fh.read())
+        board_data = checkpoint.board_data
+        board = Board([RowInstructions.from_list(ins) for ins in board_data.row_instructions],
+                      [RowInstructions.from_list(ins) for ins in board_data.column_instructions],
+                      table_type=table_type)
+        kwargs.setdefault('checkpoint_path', checkpoint_path)
+        solver = cls(board, **kwargs)
+        solver.start_count_time_()
+        try:
+            solver.continue_(solver.restore_(checkpoint))
+        finally:
+            solver.guess_locator.close()
+        solver.stop_count_time_()
+        solver.print_score_()
+        return solver
+
+    def solve(self):
+        self.start_count_time_()
+        try:
+            self.search_()
+        finally:
+            # Also when the budget ran out, or the parallel locator's worker processes would be left running.
+            self.guess_locator.close()
+        self.stop_count_time_()
+        self.print_score_()
+
+
+class IterativeBestInfoGuessSolver(IterativeGuessSolver):
+    def __init__(self, board: Board, use_line_solver: bool = False, checkpoint_path: str = None,
+                 checkpoint_interval: float = 60.0):
+        super().__init__(board, use_line_solver=use_line_solver, checkpoint_path=checkpoint_path,
+                         checkpoint_interval=checkpoint_interval)
+        self.guess_locator = MostInfoGuessLocator(board, use_line_solver, self.metrics, self.check_budget_)
+
+
+class IterativeProbingGuessSolver(IterativeGuessSolver):
+    def __init__(self, board: Board, use_line_solver: bool = False, checkpoint_path: str = None,
+                 checkpoint_interval: float = 60.0):
+        super().__init__(board, use_line_solver=use_line_solver, checkpoint_path=checkpoint_path,
+                         checkpoint_interval=checkpoint_interval)
+        self.guess_locator = ProbingGuessLocator(board, use_line_solver, self.metrics, self.check_budget_)
+
+
+# IterativeBestInfoGuessSolver with the probes of every guess spread over a process pool.
+class IterativeParallelBestInfoGuessSolver(IterativeGuessSolver):
+    def __init__(self, board: Board, use_line_solver: bool = False, processes: int = None,
+                 checkpoint_path: str = None, checkpoint_interval: float = 60.0):
+        super().__init__(board, use_line_solver=use_line_solver, checkpoint_path=checkpoint_path,
+                         checkpoint_interval=checkpoint_interval)
+        self.guess_locator = ParallelMostInfoGuessLocator(board, use_line_solver, processes)
@@ -0,0 +1,203 @@
+import multiprocessing
+import os
+import queue
+import traceback
+from typing import List, Tuple
+
+from game.board.board import Board
+from game.board.cell import RowInstructions, Location, CellState
+from game.solver.iterative_solver import IterativeGuessSolver
+from game.solver.solvertools.guesslocator import Guess, ByOrderGuessLocator
+
+SOLVED = 'solved'
+EXHAUSTED = 'exhausted'
+FAILED = 'failed'
+
+
+class SearchWorkerError(Exception):
+    # A worker process failed, so part of the search space was never searched.
+    pass
+
+
+class SharedSearch:
+    # The state shared by the workers: the task queue of decision lists, the count of tasks that are queued or being
+    # searched, how many of them are still queued, how many workers wait for a task, and the stop event.
+    def __init__(self, context):
+        self.tasks = context.Queue()
+        self.results = context.Queue()
+        self.pending = context.Value('i', 0)
+        self.queued = context.Value('i', 0)
+        self.idle = context.Value('i', 0)
+        self.stop_event = context.Event()
+
+    def put_task(self, decisions: List[Tuple[Guess, bool]]):
+        with self.pending.get_lock():
+            self.pending.value += 1
+        with self.queued.get_lock():
+            self.queued.value += 1
+        self.tasks.put(decisions)
+
+    def get_task(self, timeout: float):
+        with self.idle.get_lock():
+            self.idle.value += 1
+        try:
+            decisions = self.tasks.get(timeout=timeout)
+        finally:
+            with self.idle.get_lock():
+                self.idle.value -= 1
+        with self.queued.get_lock():
+            self.queued.value -= 1
+        return decisions
+
+    def task_done(self):
+        # Returns True if it was the last pending task, so the whole search space is exhausted.
+        with self.pending.get_lock():
+            self.pending.value -= 1
+            return self.pending.value == 0
+
+    def is_work_wanted(self):
+        return self.idle.value > self.queued.value
+
+
+# Searches the subtrees it is given, and while other workers are idle, hands them the untried branch of its oldest
+# decision (the biggest subtree it still has to search).
+class WorkStealingSolver(IterativeGuessSolver):
+    def __init__(self, board: Board, shared: SharedSearch, use_line_solver: bool = False,
+                 guess_locator_type: type = ByOrderGuessLocator, locator_args: tuple = ()):
+        super().__init__(board, use_line_solver=use_line_solver)
+        self.guess_locator = guess_locator_type(board, *locator_args)
+        self.shared = shared
+        self.tasks_shared = 0
+
+    def share_work_(self):
+        for index, frame in enumerate(self.stack):
+            if not frame.flipped:
+                decisions = [(prefix_frame.guess, True) for prefix_frame in self.stack[:index]]
+                decisions.append((frame.guess.get_flipped_guess(), True))
+                self.stack[index] = frame._replace(flipped=True)
+                self.shared.put_task(decisions)
+                self.tasks_shared += 1
+                return
+
+    def poll_(self):
+        if self.shared.stop_event.is_set():
+            return False
+        if self.shared.is_work_wanted():
+            self.share_work_()
+        return True
+
+
+def run_search_worker_(row_instructions: List[List[int]], column_instructions: List[List[int]], shared: SharedSearch,
+                       use_line_solver: bool, guess_locator_type: type, locator_args: tuple):
+    board = Board([RowInstructions.from_list(ins) for ins in row_instructions],
+                  [RowInstructions.from_list(ins) for ins in column_instructions])
+    solver = WorkStealingSolver(board, shared, use_line_solver, guess_locator_type, locator_args)
+    try:
+        while not shared.stop_event.is_set():
+            try:
+                decisions = shared.get_task(timeout=0.05)
+            except queue.Empty:
+                continue
+            board.backtrack_to(0)
+            if solver.search_(decisions):
+                shared.results.put((SOLVED, board.encode_states(), solver.get_guesses()))
+                return
+            if shared.stop_event.is_set():
+                return
+            if shared.task_done():
+                shared.results.put((EXHAUSTED, None, solver.get_guesses()))
+    except Exception:
+        # The task being searched is never done, so the others would wait for it forever. The parent stops them.
+        shared.results.put((FAILED, traceback.format_exc(), solver.get_guesses()))
+
+
+# Splits the first levels of the search tree into a frontier of partial assignments, and searches them on a pool of
+# worker processes that steal work from each other. The first worker to find a solution stops all the others.
+class ParallelGuessSolver(IterativeGuessSolver):
+    def __init__(self, board: Board, verbose: bool = False, use_line_solver: bool = False,
+                 guess_locator_type: type = ByOrderGuessLocator, locator_args: tuple = (), processes: int = None,
+                 frontier_size: int = None):
+        super().__init__(board, verbose, use_line_solver=use_line_solver)
+        self.guess_locator = guess_locator_type(board, *locator_args)
+        self.guess_locator_type = guess_locator_type
+        self.locator_args = locator_args
+        self.processes = processes or os.cpu_count()
+        self.frontier_size = frontier_size or 2 * self.processes
+
+    def build_frontier_(self):
+        # Expands the shallowest partial assignments until there are enough of them. Returns None if the board got
+        # solved on the way.
+        frontier = [[]]
+        while 0 < len(frontier) < self.frontier_size:
+            decisions = frontier.pop(0)
+            self.board.backtrack_to(0)
+            self.stack = []
+            self.check_budget_()
+            if not self.replay_(decisions):
+                continue
+            if self.board.is_board_solved():
+                return None
+            last_guess = decisions[-1][0] if decisions else Guess(Location(-1, -1), CellState.FILL)
+            guess = self.next_guess_location(last_guess)
+            if guess is None:
+                if self.board.is_board_solved():
+                    return None
+                continue
+            self.add_guess_()
+            frontier.append(decisions + [(guess, True)])
+            frontier.append(decisions + [(guess.get_flipped_guess(), True)])
+        self.board.backtrack_to(0)
+        self.stack = []
+        return frontier
+
+    def search_(self, decisions: List[Tuple[Guess, bool]] = ()):
+        self.stack = []
+        if not self.propagate_():
+            return False
+        if self.board.is_board_solved():
+            return True
+        frontier = self.build_frontier_()
+        if frontier is None:
+            return True
+        if not frontier:
+            return False
+        context = multiprocessing.get_context()
+        shared = SharedSearch(context)
+        for task in frontier:
+            shared.put_task(task)
+        args = ([list(ins) for ins in self.board.row_instructions],
+                [list(ins) for ins in self.board.column_instructions],
+                shared, self.use_line_solver, self.guess_locator_type, self.locator_args)
+        workers = [context.Process(target=run_search_worker_, args=args, daemon=True) for _ in range(self.processes)]
+        for worker in workers:
+            worker.start()
+        try:
+            result = None
+            while result is None:
+                # The workers do not know the budget, the time limit is checked here and stops them all. Guesses and
+                # propagation steps are only counted for the frontier.
+                self.check_budget_()
+                try:
+                    result = shared.results.get(timeout=0.1)
+                except queue.Empty:
+                    failed = [worker for worker in workers if worker.exitcode not in (None, 0)]
+                    if failed:
+                        raise SearchWorkerError('Search worker exited with code {}'.format(failed[0].exitcode))
+                    if not any(worker.is_alive() for worker in workers):
+                        break
+        finally:
+            shared.stop_event.set()
+            for worker in workers:
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    worker.terminate()
+        if result is None:
+            return False
+        status, codes, guesses = result
+        self.guesses += guesses
+        if status == FAILED:
+            raise SearchWorkerError('Search worker failed:\n{}'.format(codes))
+        if status != SOLVED:
+            return False
+        self.board.load_states(codes)
+        return True
@@ -0,0 +1,62 @@
+from typing import List, NamedTuple
+
+import numpy as np
+
+from game.board.board import Board
+from game.board.cell import Location, FILL_CODE
+from game.solver.iterative_solver import IterativeGuessSolver
+
+
+class SolutionCount(NamedTuple):
+    solutions: int
+    # True when the whole search space was searched, so there are no more solutions than the ones counted.
+    complete: bool
+    # Cells that are filled in only one of the first two solutions.
+    differing_cells: List[Location]
+
+    def is_unique(self):
+        return self.complete and self.solutions == 1
+
+
+# Runs the guess search past the first solution, until it finds limit solutions or runs out of branches. Every branch
+# fixes a cell differently from all the others, so each solution found has its own pattern of filled cells.
+class SolutionCounter(IterativeGuessSolver):
+    def __init__(self, board: Board, limit: int = 2, use_line_solver: bool = False):
+        super().__init__(board, use_line_solver=use_line_solver)
+        self.limit = limit
+        self.solutions = []
+
+    def count_solutions(self):
+        # Leaves the board at the first solution, if there is one.
+        self.solutions = []
+        complete = True
+        last_guess = self.start_()
+        while last_guess is not None and self.continue_(last_guess):
+            self.solutions.append(self.board.encode_states())
+            if len(self.solutions) >= self.limit:
+                complete = False
+                break
+            last_guess = self.backtrack_()
+        self.board.backtrack_to(0)
+        if self.solutions:
+            self.board.load_states(self.solutions[0])
+        return SolutionCount(len(self.solutions), complete, self.get_differing_cells())
+
+    def get_differing_cells(self):
+        if len(self.solutions) < 2:
+            return []
+        first, second = (np.frombuffer(codes, dtype=np.int8) == FILL_CODE for codes in self.solutions[:2])
+        return [Location(*divmod(int(index), self.columns)) for index in np.flatnonzero(first != second)]
+
+    def solve(self):
+        self.start_count_time_()
+        count = self.count_solutions()
+        self.stop_count_time_()
+        if count.is_unique():
+            print('The board has a single solution.')
+        elif count.solutions == 0:
+            print('The board has no solution.')
+        else:
+            print('The board has {}{} solutions, the first two differ at {}.'.format(
+                '' if count.complete else 'at least ', count.solutions, count.differing_cells))
+        return count
@@ -1,8 +1,16 @@
+import cProfile
+import contextlib
+import io
+import pstats
 from abc import ABC, abstractmethod
 from time import time, sleep
+from typing import Callable
 
 from game.board.board import Board
+from game.solver.budget import Budget, BudgetExceeded, SolveResult, SOLVED, UNSOLVED, GAVE_UP
+from game.solver.instrumentation import Metrics, SolveMetrics, CACHE_HITS, CACHE_MISSES, SOLVED_EVENT, LINE_SOLVES
 from game.solver.solvertools.guesslocator import Guess
+from game.solver.solvertools.line_cache import line_solve_cache
 
 
 class Solver(ABC):
@@ -17,11 +25,79 @@ class Solver(ABC):
         self.duration_in_milli_seconds = None
         self.guesses = 0
         self.guess_locator = None
+        self.metrics = Metrics()
+        # Called with (event, solver, **details) on every event, see instrumentation. Events are only built when
+        # there is a listener.
+        self.listeners = []
+        self.cache_stats_at_start = None
+        # Checked by check_budget_ on every search step and every few line solves, None means no limits.
+        self.budget = None
+        self.gave_up = None
 
     @abstractmethod
     def solve(self):
         pass
 
+    def add_listener(self, listener: Callable):
+        self.listeners.append(listener)
+
+    def emit_(self, event: str, **details):
+        for listener in self.listeners:
+            listener(event, self, **details)
+
+    def get_metrics(self, profile: str = None):
+        timers_ms = {name: seconds * 1000 for name, seconds in self.metrics.timers.items()}
+        return SolveMetrics(self.board.is_board_solved(), self.duration_in_milli_seconds, self.board.get_steps(),
+                            self.guesses, dict(self.metrics.counters), timers_ms, profile)
+
+    def solve_with_metrics(self, profile: bool = False, quiet: bool = True, profile_lines: int = 25):
+        # Solves, optionally under cProfile and without printing, and returns the metrics of the solve.
+        output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+        profiler = cProfile.Profile() if profile else None
+        with output:
+            if profiler is not None:
+                profiler.runcall(self.solve)
+            else:
+                self.solve()
+        profile_stats = None
+        if profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(profile_lines)
+            profile_stats = stream.getvalue()
+        return self.get_metrics(profile_stats)
+
+    def check_budget_(self):
+        if self.budget is None:
+            return
+        seconds = time() - self.start_time
+        limit = self.budget.get_exceeded(seconds, self.guesses, self.metrics.get_counter(LINE_SOLVES))
+        if limit is not None:
+            self.gave_up = limit
+            raise BudgetExceeded(limit)
+
+    def abandon_search_(self):
+        # Closes the levels of a search stopped halfway (by the budget), the board keeps what was deduced before the
+        # first guess.
+        self.board.backtrack_to(0)
+
+    def solve_within(self, budget: Budget, quiet: bool = True):
+        # Solves until the board is solved, the search is exhausted, or the budget runs out, and returns the
+        # result instead of raising.
+        self.budget = budget
+        self.gave_up = None
+        output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+        with output:
+            try:
+                self.solve()
+            except BudgetExceeded:
+                self.abandon_search_()
+                self.stop_count_time_()
+        if self.gave_up is not None:
+            status = GAVE_UP
+        else:
+            status = SOLVED if self.board.is_board_solved() else UNSOLVED
+        return SolveResult(status, self.gave_up, self.board.encode_states(), self.get_metrics())
+
     def add_guess_(self):
         self.guesses = self.guesses + 1
 
@@ -30,9 +106,16 @@ class Solver(ABC):
 
     def start_count_time_(self):
         self.start_time = time()
+        self.cache_stats_at_start = line_solve_cache.get_stats()
 
     def stop_count_time_(self):
         self.duration_in_milli_seconds = (time() - self.start_time) * 1000
+        # The line solve cache is shared, so this is only exact when a single solver runs in the process.
+        cache_stats = line_solve_cache.get_stats()
+        self.metrics.count(CACHE_HITS, cache_stats.hits - self.cache_stats_at_start.hits)
+        self.metrics.count(CACHE_MISSES, cache_stats.misses - self.cache_stats_at_start.misses)
+        if self.listeners:
+            self.emit_(SOLVED_EVENT, solved=self.board.is_board_solved())
 
     def start_wait_cycle(self):
         while time() < self.wait_cycle_start + self.wait_time:
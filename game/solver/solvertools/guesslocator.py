@@ -1,8 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import NamedTuple
+from typing import Callable, NamedTuple, Dict, List, Tuple
 
 from game.board.board import Board
-from game.board.cell import Location, CellState
+from game.board.cell import Location, CellState, STATE_CODES, CODE_STATES, UNSET_CODE
+from game.solver.instrumentation import Metrics
+from game.solver.solvertools.propagation import LinePropagator
 from game.solver.solvertools.solver_tools import BoardInfoAdder
 
 
@@ -26,6 +28,17 @@ class GuessLocator(ABC):
     def get_next_guess(self, last_guess: Guess):
         pass
 
+    def get_cached_probes(self):
+        # The locator's cached results, in the form of serialization.SearchState.probes, for search checkpoints.
+        return []
+
+    def load_cached_probes(self, probes: List[Tuple[int, int, int, bool, List[Tuple[int, int, int]], List[int]]]):
+        pass
+
+    def close(self):
+        # Releases what the locator holds beyond the search, called by the solver once the search is over.
+        pass
+
 
 class ByOrderGuessLocator(GuessLocator):
     def __init__(self, board: Board):
@@ -46,23 +59,140 @@ class ByOrderGuessLocator(GuessLocator):
 
 
 class MostInfoGuessLocator(GuessLocator):
-    def __init__(self, board: Board):
+    def __init__(self, board: Board, use_line_solver: bool = False, metrics: Metrics = None,
+                 poll: Callable[[], None] = None):
         super().__init__(board)
-        self.info_adder = BoardInfoAdder(self.board)
+        self.info_adder = BoardInfoAdder(self.board, use_line_solver, metrics, poll)
 
     def get_next_guess(self, last_guess: Guess):
         best_guess = None
         best_info_added_count = -1
-        for row_num, row in enumerate(self.board.game_table.table):
-            for col_num, cell in enumerate(row):
-                if cell.get_state() == CellState.UNSET:
+        level = self.board.get_level()
+        for row_num in range(self.rows):
+            # Read as codes, not cells, which are proxies on a PackedCellTable. Every try is backtracked, so the codes
+            # stay valid for the whole row.
+            row = self.board.get_row(row_num)
+            for col_num, code in enumerate(row.get_codes()):
+                if code == UNSET_CODE:
                     for state in [CellState.FILL, CellState.NO_FILL]:
-                        cell.set_state(state)
+                        self.board.push_level()
+                        row.set_state(col_num, state)
                         info_added = self.info_adder.add_info()
                         if len(info_added) > best_info_added_count:
                             best_guess = Guess(Location(row_num, col_num), state)
                             best_info_added_count = len(info_added)
-                        for cell in info_added:
-                            cell.set_state(CellState.UNSET)
-                    cell.set_state(CellState.UNSET)
+                        self.board.backtrack_to(level)
+        return best_guess
+
+
+class ProbeResult(NamedTuple):
+    consistent: bool
+    # The state of every cell the probe set (the probed cell included).
+    assignments: Dict[Location, CellState]
+    # The lines the probe read, and their versions on the board, for invalidating the cached result.
+    rows: Tuple[int, ...]
+    columns: Tuple[int, ...]
+    versions: Tuple[int, ...]
+
+
+class ProbingGuessLocator(GuessLocator):
+    def __init__(self, board: Board, use_line_solver: bool = False, metrics: Metrics = None,
+                 poll: Callable[[], None] = None):
+        super().__init__(board)
+        self.propagator = LinePropagator(board, use_line_solver, metrics, poll)
+        self.probes = {}
+        self.probes_run = 0
+        self.deductions = 0
+
+    def get_versions_(self, rows, columns):
+        return tuple(self.board.row_versions[row] for row in rows) + \
+            tuple(self.board.column_versions[column] for column in columns)
+
+    def probe_(self, location: Location, state: CellState):
+        cached = self.probes.get((location, state))
+        if cached is not None and cached.versions == self.get_versions_(cached.rows, cached.columns):
+            return cached
+        self.probes_run += 1
+        level = self.board.get_level()
+        self.board.push_level()
+        mark = len(self.board.trail)
+        self.board.set_cell_state(location, state)
+        self.propagator.push_location(location)
+        consistent = self.propagator.propagate()
+        assignments = {entry.location: self.board.get_cell_state(entry.location) for entry in self.board.trail[mark:]}
+        self.board.backtrack_to(level)
+        result = self.make_result_(consistent, assignments)
+        self.probes[(location, state)] = result
+        return result
+
+    def make_result_(self, consistent: bool, assignments: Dict[Location, CellState], versions: Tuple[int, ...] = None):
+        # Only lines with a changed cell are solved by the propagation, so these are all the probe depends on.
+        rows = tuple({changed.row for changed in assignments})
+        columns = tuple({changed.column for changed in assignments})
+        if versions is None:
+            versions = self.get_versions_(rows, columns)
+        return ProbeResult(consistent, assignments, rows, columns, versions)
+
+    def get_cached_probes(self):
+        return [(location.row, location.column, STATE_CODES[state], result.consistent,
+                 [(changed.row, changed.column, STATE_CODES[changed_state])
+                  for changed, changed_state in result.assignments.items()], list(result.versions))
+                for (location, state), result in self.probes.items()]
+
+    def load_cached_probes(self, probes: List[Tuple[int, int, int, bool, List[Tuple[int, int, int]], List[int]]]):
+        for row, column, code, consistent, assignments, versions in probes:
+            assignments = {Location(changed_row, changed_column): CODE_STATES[changed_code]
+                           for changed_row, changed_column, changed_code in assignments}
+            self.probes[(Location(row, column), CODE_STATES[code])] = \
+                self.make_result_(consistent, assignments, tuple(versions))
+
+    def deduce_(self, assignments):
+        # Sets cells that hold in every solution of the current board, and propagates them.
+        for location, state in assignments:
+            if self.board.get_cell_state(location) != state:
+                self.board.set_cell_state(location, state)
+                self.propagator.push_location(location)
+        self.deductions += len(assignments)
+        return self.propagator.propagate()
+
+    def get_next_guess(self, last_guess: Guess):
+        deduced = True
+        while deduced:
+            deduced = False
+            best_guess = None
+            best_info_added_count = -1
+            for row_num in range(self.rows):
+                row = self.board.get_row(row_num)
+                codes = row.get_codes()
+                for col_num in range(self.columns):
+                    if codes[col_num] != UNSET_CODE:
+                        continue
+                    location = Location(row_num, col_num)
+                    fill = self.probe_(location, CellState.FILL)
+                    no_fill = self.probe_(location, CellState.NO_FILL)
+                    if not fill.consistent and not no_fill.consistent:
+                        # The board has no solution, let the solver backtrack.
+                        return None
+                    if not fill.consistent or not no_fill.consistent:
+                        forced = fill if fill.consistent else no_fill
+                        if not self.deduce_(forced.assignments.items()):
+                            return None
+                        deduced = True
+                        codes = row.get_codes()
+                        continue
+                    agreed = [(agreed_location, agreed_state)
+                              for agreed_location, agreed_state in fill.assignments.items()
+                              if no_fill.assignments.get(agreed_location) == agreed_state]
+                    if agreed:
+                        if not self.deduce_(agreed):
+                            return None
+                        deduced = True
+                        codes = row.get_codes()
+                        continue
+                    for state, result in [(CellState.FILL, fill), (CellState.NO_FILL, no_fill)]:
+                        if len(result.assignments) > best_info_added_count:
+                            best_guess = Guess(location, state)
+                            best_info_added_count = len(result.assignments)
+            if self.board.is_board_solved():
+                return None
         return best_guess
@@ -0,0 +1,77 @@
+import sys
+from collections import OrderedDict
+from typing import NamedTuple
+
+from game.board.cell import CellRow, RowInstructions
+from game.solver.solvertools.line_solver import LineSolver
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+    size_in_bytes: int
+
+    def get_hit_rate(self):
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / lookups
+
+
+# Per entry bytes of the cache's own bookkeeping (the key tuple, the dict slot and the LRU links), on top of the row's
+# codes and the agreed codes.
+ENTRY_OVERHEAD = sys.getsizeof((None, None)) + 100
+
+
+# LRU cache of line solver results, bounded by an estimate of the memory its entries take. The key is the
+# instructions tuple (shared with the RowInstructions) and the row's state codes as bytes, the value is the agreed
+# state codes as bytes (or None if the row cannot be solved).
+# Only the line solver uses it, which is opt-in: solvers run it with use_line_solver=True (the batch runner does by
+# default), and the RowAnalyzer otherwise.
+class LineSolveCache:
+    def __init__(self, max_bytes: int = 64 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size_in_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(row: CellRow, instructions: RowInstructions):
+        return instructions.get_instructions(), row.encode()
+
+    @staticmethod
+    def get_entry_size_(key, agreed_codes):
+        return ENTRY_OVERHEAD + sys.getsizeof(key[1]) + sys.getsizeof(agreed_codes)
+
+    def get_agreed_codes(self, row: CellRow, instructions: RowInstructions):
+        key = self.make_key(row, instructions)
+        entries = self.entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        agreed_codes = LineSolver.solve_(key[1], key[0])
+        entries[key] = agreed_codes
+        self.size_in_bytes += self.get_entry_size_(key, agreed_codes)
+        while self.size_in_bytes > self.max_bytes and entries:
+            self.size_in_bytes -= self.get_entry_size_(*entries.popitem(last=False))
+        return agreed_codes
+
+    def get_stats(self):
+        return CacheStats(self.hits, self.misses, len(self.entries), self.size_in_bytes)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.size_in_bytes = 0
+        self.reset_stats()
+
+
+# Shared by all the solvers in the process.
+line_solve_cache = LineSolveCache()
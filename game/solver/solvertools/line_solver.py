@@ -0,0 +1,118 @@
+from game.board.cell import CellRow, RowInstructions, UNSET_CODE, FILL_CODE, NO_FILL_CODE, CODE_STATES
+
+
+# Exact line solver. Finds every cell that all valid placements of the instructions agree on, in O(n*k) time
+# (n - row length, k - number of instructions).
+class LineSolver:
+    def __init__(self, row: CellRow, instructions: RowInstructions, cache=None):
+        self.row = row
+        self.instructions = instructions
+        # The state code every valid placement agrees on (UNSET_CODE where they differ) of every cell, as bytes.
+        if cache is None:
+            self.agreed_codes = self.solve_(row.get_codes(), instructions.get_instructions())
+        else:
+            self.agreed_codes = cache.get_agreed_codes(row, instructions)
+
+    def get_is_solvable(self):
+        return self.agreed_codes is not None
+
+    def get_agreed_states(self):
+        if self.agreed_codes is None:
+            return None
+        return [CODE_STATES[code] for code in self.agreed_codes]
+
+    def get_info(self):
+        # Returns the (index, state) of every unset cell that can be deduced, or None if the row is not solvable.
+        if self.agreed_codes is None:
+            return None
+        return [(index, CODE_STATES[agreed_code])
+                for index, (code, agreed_code) in enumerate(zip(self.row.get_codes(), self.agreed_codes))
+                if agreed_code != UNSET_CODE and code == UNSET_CODE]
+
+    @staticmethod
+    def solve_(codes, instructions):
+        # codes are the state codes of the row's cells.
+        length = len(codes)
+        count = len(instructions)
+        can_fill = [code != NO_FILL_CODE for code in codes]
+        can_empty = [code != FILL_CODE for code in codes]
+        # blocked[i] is the number of NO_FILL cells before index i, so a block fits in [start, stop) iff
+        # blocked[start] == blocked[stop].
+        blocked = [0] * (length + 1)
+        for index, fill in enumerate(can_fill):
+            blocked[index + 1] = blocked[index] + (not fill)
+
+        # prefix[j][i]: cells [0, i) can hold the first j instructions.
+        prefix = [[False] * (length + 1) for _ in range(count + 1)]
+        prefix[0][0] = True
+        for index in range(length):
+            prefix[0][index + 1] = prefix[0][index] and can_empty[index]
+        for ins_index in range(1, count + 1):
+            ins = instructions[ins_index - 1]
+            current, previous = prefix[ins_index], prefix[ins_index - 1]
+            for stop in range(1, length + 1):
+                if current[stop - 1] and can_empty[stop - 1]:
+                    current[stop] = True
+                    continue
+                start = stop - ins
+                if start < 0 or blocked[start] != blocked[stop]:
+                    continue
+                if start == 0:
+                    current[stop] = previous[0]
+                else:
+                    current[stop] = can_empty[start - 1] and previous[start - 1]
+        if not prefix[count][length]:
+            return None
+
+        # suffix[j][i]: cells [i, length) can hold the instructions from j onward.
+        suffix = [[False] * (length + 1) for _ in range(count + 1)]
+        suffix[count][length] = True
+        for index in range(length - 1, -1, -1):
+            suffix[count][index] = suffix[count][index + 1] and can_empty[index]
+        for ins_index in range(count - 1, -1, -1):
+            ins = instructions[ins_index]
+            current, following = suffix[ins_index], suffix[ins_index + 1]
+            for start in range(length - 1, -1, -1):
+                if current[start + 1] and can_empty[start]:
+                    current[start] = True
+                    continue
+                stop = start + ins
+                if stop > length or blocked[start] != blocked[stop]:
+                    continue
+                if stop == length:
+                    current[start] = following[length]
+                else:
+                    current[start] = can_empty[stop] and following[stop + 1]
+
+        # A cell may be empty if some split of the instructions around it is valid.
+        may_empty = [can_empty[index] and any(prefix[ins_index][index] and suffix[ins_index][index + 1]
+                                              for ins_index in range(count + 1))
+                     for index in range(length)]
+        # A cell may be filled if some valid placement of an instruction covers it.
+        coverage = [0] * (length + 1)
+        for ins_index, ins in enumerate(instructions):
+            before, after = prefix[ins_index], suffix[ins_index + 1]
+            for start in range(length - ins + 1):
+                stop = start + ins
+                if blocked[start] != blocked[stop]:
+                    continue
+                if start > 0 and not (can_empty[start - 1] and before[start - 1]):
+                    continue
+                if start == 0 and not before[0]:
+                    continue
+                if stop < length and not (can_empty[stop] and after[stop + 1]):
+                    continue
+                if stop == length and not after[length]:
+                    continue
+                coverage[start] += 1
+                coverage[stop] -= 1
+
+        agreed_codes = bytearray(length)
+        covered = 0
+        for index in range(length):
+            covered += coverage[index]
+            if covered > 0 and not may_empty[index]:
+                agreed_codes[index] = FILL_CODE
+            elif covered == 0 and may_empty[index]:
+                agreed_codes[index] = NO_FILL_CODE
+        return bytes(agreed_codes)
@@ -0,0 +1,96 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from game.board import serialization
+from game.board.board import Board
+from game.board.cell import Location, CellState, RowInstructions, UNSET_CODE
+from game.board.packed_table import PackedCellTable
+from game.solver.solvertools.guesslocator import Guess, MostInfoGuessLocator
+from game.solver.solvertools.solver_tools import BoardInfoAdder
+
+PROBE_STATES = (CellState.FILL, CellState.NO_FILL)
+
+# Each worker process keeps its own copy of the board, built once from the instructions.
+worker_board = None
+worker_info_adder = None
+
+
+def init_probe_worker_(row_instructions: List[List[int]], column_instructions: List[List[int]],
+                       use_line_solver: bool):
+    global worker_board, worker_info_adder
+    worker_board = Board([RowInstructions.from_list(ins) for ins in row_instructions],
+                         [RowInstructions.from_list(ins) for ins in column_instructions],
+                         table_type=PackedCellTable)
+    worker_info_adder = BoardInfoAdder(worker_board, use_line_solver)
+
+
+def probe_cells_(packed_codes: bytes, cell_indexes: List[int]):
+    # Probes both states of the given cells (indexes into the row-major grid) on the worker's board. Returns the
+    # best (info added count, probe order) of the chunk, where probe order breaks ties the same way the sequential
+    # locator does.
+    rows, columns = worker_board.get_size()
+    worker_board.load_states(serialization.unpack_codes(packed_codes, rows * columns))
+    level = worker_board.get_level()
+    best = None
+    for cell_index in cell_indexes:
+        location = Location(*divmod(cell_index, columns))
+        for state_index, state in enumerate(PROBE_STATES):
+            worker_board.push_level()
+            worker_board.set_cell_state(location, state)
+            info_added = worker_info_adder.add_info()
+            worker_board.backtrack_to(level)
+            order = 2 * cell_index + state_index
+            if best is None or len(info_added) > best[0]:
+                best = (len(info_added), order)
+    return best
+
+
+# MostInfoGuessLocator that spreads the probes over a process pool. Every task gets the grid (packed 2 bits per cell)
+# and a chunk of unset cells, and the chunks' best probes are reduced to the same guess the sequential locator would
+# choose.
+class ParallelMostInfoGuessLocator(MostInfoGuessLocator):
+    def __init__(self, board: Board, use_line_solver: bool = False, processes: int = None,
+                 chunks_per_process: int = 4):
+        super().__init__(board, use_line_solver)
+        self.use_line_solver = use_line_solver
+        self.processes = processes or os.cpu_count()
+        self.chunks_per_process = chunks_per_process
+        self.pool = None
+
+    def get_pool_(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.processes,
+                initializer=init_probe_worker_,
+                initargs=([list(ins) for ins in self.board.row_instructions],
+                          [list(ins) for ins in self.board.column_instructions],
+                          self.use_line_solver))
+        return self.pool
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def split_(self, cell_indexes: List[int]):
+        chunk_count = max(1, min(len(cell_indexes), self.processes * self.chunks_per_process))
+        return [cell_indexes[start::chunk_count] for start in range(chunk_count)]
+
+    def get_next_guess(self, last_guess: Guess):
+        codes = self.board.encode_states()
+        cell_indexes = [index for index, code in enumerate(codes) if code == UNSET_CODE]
+        if not cell_indexes:
+            return None
+        chunks = self.split_(cell_indexes)
+        packed_codes = serialization.pack_codes(codes)
+        results = self.get_pool_().map(probe_cells_, [packed_codes] * len(chunks), chunks)
+        _, order = max(results, key=lambda result: (result[0], -result[1]))
+        cell_index, state_index = divmod(order, 2)
+        return Guess(Location(*divmod(cell_index, self.columns)), PROBE_STATES[state_index])
@@ -0,0 +1,96 @@
+from heapq import heappush, heappop
+from typing import Callable, List
+
+from game.board.board import Board
+from game.board.cell import Location, UNSET_CODE
+from game.solver.instrumentation import Metrics, LINE_SOLVES
+from game.solver.solvertools.solver_tools import RowInfoAdder, CellInfoToAdd, POLL_INTERVAL
+
+ROW = 0
+COLUMN = 1
+
+
+# Worklist based constraint propagation. Only lines that were pushed (because one of their cells changed) are solved,
+# lowest slack first, until the queue is empty.
+class LinePropagator:
+    def __init__(self, board: Board, use_line_solver: bool = False, metrics: Metrics = None,
+                 poll: Callable[[], None] = None):
+        self.board = board
+        # Counts the line solves when set.
+        self.metrics = metrics
+        # Called every POLL_INTERVAL line solves, it may raise to stop a long propagation (see Solver.check_budget_).
+        self.poll = poll
+        self.rows, self.columns = board.get_size()
+        self.use_line_solver = use_line_solver
+        self.queue = []
+        self.queued = {}
+        # Slack is the number of cells a line has beyond the minimal length of its instructions. Lines with less
+        # slack are more likely to yield info, so they are solved first.
+        self.slacks = {
+            ROW: [self.columns - ins.get_min_length() for ins in board.row_instructions],
+            COLUMN: [self.rows - ins.get_min_length() for ins in board.column_instructions],
+        }
+        self.lines_solved = 0
+        # A line pushed by the propagation gets the round after the round of the line that pushed it. The last round
+        # is how many sweeps over the changed lines a round by round propagation would need.
+        self.rounds = 0
+
+    def push(self, direction: int, index: int, line_round: int = 1):
+        if (direction, index) not in self.queued:
+            self.queued[(direction, index)] = line_round
+            heappush(self.queue, (self.slacks[direction][index], direction, index))
+
+    def push_row(self, row: int):
+        self.push(ROW, row)
+
+    def push_column(self, column: int):
+        self.push(COLUMN, column)
+
+    def push_location(self, location: Location):
+        self.push(ROW, location.row)
+        self.push(COLUMN, location.column)
+
+    def push_all(self):
+        for row in range(self.rows):
+            self.push(ROW, row)
+        for column in range(self.columns):
+            self.push(COLUMN, column)
+
+    def clear(self):
+        self.queue = []
+        self.queued = {}
+
+    def get_line_(self, direction: int, index: int):
+        if direction == ROW:
+            return self.board.get_row(index), self.board.get_row_instructions(index)
+        return self.board.get_column(index), self.board.get_column_instructions(index)
+
+    def propagate(self, info_to_add: List[CellInfoToAdd] = None):
+        # Drains the queue to a fixpoint, setting every cell found (and adding it to info_to_add, if given). Returns
+        # False if a line cannot be solved (the queue is cleared in that case).
+        while self.queue:
+            if self.poll is not None and self.lines_solved % POLL_INTERVAL == 0:
+                self.poll()
+            _, direction, index = heappop(self.queue)
+            line_round = self.queued.pop((direction, index))
+            self.rounds = max(self.rounds, line_round)
+            row, instructions = self.get_line_(direction, index)
+            before = row.encode()
+            self.lines_solved += 1
+            if self.metrics is not None:
+                self.metrics.count(LINE_SOLVES)
+            info = RowInfoAdder(row, instructions, self.use_line_solver).add_info()
+            if info is False:
+                self.clear()
+                return False
+            if not info:
+                continue
+            for cell_info in info:
+                cell_info.set_cell()
+            if info_to_add is not None:
+                info_to_add.extend(info)
+            other_direction = COLUMN if direction == ROW else ROW
+            for other_index, (code, new_code) in enumerate(zip(before, row.encode())):
+                if code == UNSET_CODE and new_code != UNSET_CODE:
+                    self.push(other_direction, other_index, line_round + 1)
+        return True
@@ -1,9 +1,12 @@
-from typing import NamedTuple, List
-
-from func_timeout import func_timeout, FunctionTimedOut
+from bisect import bisect_right
+from time import perf_counter
+from typing import Callable, NamedTuple, List
 
 from game.board.board import Board, entry
-from game.board.cell import CellRow, CellState, RowInstructions, Cell
+from game.board.cell import CellRow, CellState, RowInstructions, Cell, UNSET_CODE, FILL_CODE, NO_FILL_CODE
+from game.solver.instrumentation import Metrics, INFO_ROUNDS, LINE_SOLVES, ADD_INFO_TIME
+from game.solver.solvertools.line_cache import line_solve_cache
+from game.solver.solvertools.line_solver import LineSolver
 
 
 class CellInfoToAdd(NamedTuple):
@@ -18,22 +21,51 @@ class CellInfoToAdd(NamedTuple):
         self.cell.set_state(CellState.UNSET)
 
 
+# Line solves between two calls of a tool's poll callback.
+POLL_INTERVAL = 16
+
+
 class BoardInfoAdder:
-    def __init__(self, board: Board):
+    def __init__(self, board: Board, use_line_solver: bool = False, metrics: Metrics = None,
+                 poll: Callable[[], None] = None):
         self.board = board
         self.rows, self.columns = board.get_size()
-
-    @staticmethod
-    def add_row_info_(row: CellRow, instructions: RowInstructions):
+        self.use_line_solver = use_line_solver
+        # Counts the rounds and line solves, and times add_info, when set.
+        self.metrics = metrics
+        # Called every POLL_INTERVAL line solves, it may raise to stop a long add_info (see Solver.check_budget_).
+        self.poll = poll
+        self.lines_solved = 0
+
+    def add_row_info_(self, row: CellRow, instructions: RowInstructions):
         if row.is_fully_set():
             return []
-        return RowInfoAdder(row, instructions).add_info()
+        self.lines_solved += 1
+        if self.metrics is not None:
+            self.metrics.count(LINE_SOLVES)
+        if self.poll is not None and self.lines_solved % POLL_INTERVAL == 0:
+            self.poll()
+        info = RowInfoAdder(row, instructions, self.use_line_solver).add_info()
+        if info:
+            for cell_info in info:
+                cell_info.set_cell()
+        return info
 
     def add_info(self):
+        if self.metrics is None:
+            return self.add_info_()
+        start = perf_counter()
+        info_to_add = self.add_info_()
+        self.metrics.add_time(ADD_INFO_TIME, perf_counter() - start)
+        return info_to_add
+
+    def add_info_(self):
         info_added = True
         info_to_add = []
         while not self.board.is_board_solved() and info_added:
             info_added = False
+            if self.metrics is not None:
+                self.metrics.count(INFO_ROUNDS)
             for row in range(self.rows):
                 info = self.add_row_info_(self.board.get_row(row), self.board.get_row_instructions(row))
                 if info:
@@ -48,13 +80,20 @@ class BoardInfoAdder:
 
 
 class RowInfoAdder:
-    def __init__(self, row: CellRow, instructions: RowInstructions):
-        self.left_most_ranges = RowAnalyzer(row, instructions).get_left_most_ranges()
-        self.right_most_ranges = RowAnalyzer(row.reverse(), instructions.reverse()).get_right_most_ranges()
+    def __init__(self, row: CellRow, instructions: RowInstructions, use_line_solver: bool = False):
         self.row = row
         self.instructions = instructions
+        self.codes = row.get_codes()
+        self.line_solver = None
+        if use_line_solver:
+            self.line_solver = LineSolver(row, instructions, line_solve_cache)
+            return
+        self.left_most_ranges = RowAnalyzer(row, instructions).get_left_most_ranges()
+        self.right_most_ranges = RowAnalyzer(row.reverse(), instructions.reverse()).get_right_most_ranges()
 
     def add_info(self):
+        if self.line_solver:
+            return self.add_line_solver_info_()
         if self.left_most_ranges is None or self.right_most_ranges is None:
             return False
         info_added = []
@@ -73,11 +112,17 @@ class RowInfoAdder:
             info_added.extend(self.add_no_fill_info_(left_rng, right_rng))
         return info_added
 
+    def add_line_solver_info_(self):
+        info = self.line_solver.get_info()
+        if info is None:
+            return False
+        return [CellInfoToAdd(self.row[index], state) for index, state in info]
+
     def add_no_fill_info_(self, left_rng, right_rng):
         info_added = []
         for index in range(right_rng.stop, left_rng.start):
-            assert self.row[index].get_state() != CellState.FILL
-            if self.row[index].get_state() != CellState.NO_FILL:
+            assert self.codes[index] != FILL_CODE
+            if self.codes[index] != NO_FILL_CODE:
                 info_added.append(CellInfoToAdd(self.row[index], CellState.NO_FILL))
         return info_added
 
@@ -85,8 +130,8 @@ class RowInfoAdder:
         info_added = []
         indexes_to_fill_set = set(left_rng).intersection(set(right_rng))
         for index in indexes_to_fill_set:
-            assert self.row[index].get_state() != CellState.NO_FILL
-            if self.row[index].get_state() == CellState.UNSET:
+            assert self.codes[index] != NO_FILL_CODE
+            if self.codes[index] == UNSET_CODE:
                 info_added.append(CellInfoToAdd(self.row[index], CellState.FILL))
         return info_added
 
@@ -113,11 +158,11 @@ class RowInfoAdder:
 
     def are_mutual_ranges_blocked(self, left_rng: range, right_rng: range):
         return (right_rng.stop < len(self.row) and
-                self.row[right_rng.stop].get_state() == CellState.NO_FILL and
-                self.row[right_rng.stop - 1].get_state() == CellState.FILL) or \
+                self.codes[right_rng.stop] == NO_FILL_CODE and
+                self.codes[right_rng.stop - 1] == FILL_CODE) or \
                 (left_rng.start > 0 and
-                 self.row[left_rng.start - 1].get_state() == CellState.NO_FILL and
-                 self.row[left_rng.start].get_state() == CellState.FILL)
+                 self.codes[left_rng.start - 1] == NO_FILL_CODE and
+                 self.codes[left_rng.start] == FILL_CODE)
 
 
 class SingleInstruction(NamedTuple):
@@ -150,23 +195,43 @@ class RangeInfo:
 
     def __contains__(self, item):
         if isinstance(item, int):
-            return item in self.range
+            return self.range.start <= item < self.range.stop
         if isinstance(item, range):
-            return item[0] in self.range and item[-1] in self.range
+            return len(item) > 0 and self.range.start <= item.start and item[-1] < self.range.stop
         return False
 
 
+# The free (not NO_FILL) segments of a line, sorted by position. Built once per line state: membership and the next
+# free or filled cell are array lookups, and the segment after an index is found by bisecting the segment stops.
 class RangesManager:
     def __init__(self, row: CellRow):
+        self.codes = row.get_codes()
+        length = len(self.codes)
         self.ranges = []
         start_idx = 0
-        for i, cell in enumerate(row):
-            if cell.to_bool() is False:
+        for i, code in enumerate(self.codes):
+            if code == NO_FILL_CODE:
                 if start_idx != i:
                     self.ranges.append(RangeInfo(range(start_idx, i)))
                 start_idx = i + 1
-        if start_idx < len(row):
-            self.ranges.append(RangeInfo(range(start_idx, len(row))))
+        if start_idx < length:
+            self.ranges.append(RangeInfo(range(start_idx, length)))
+        self.stops = [rng.get_stop_index() for rng in self.ranges]
+        # next_free[i] and next_fill[i] are the first free and the first filled index from i onward, or the line's
+        # length if there is none.
+        self.next_free = [length] * (length + 1)
+        self.next_fill = [length] * (length + 1)
+        for i in range(length - 1, -1, -1):
+            code = self.codes[i]
+            self.next_free[i] = i if code != NO_FILL_CODE else self.next_free[i + 1]
+            self.next_fill[i] = i if code == FILL_CODE else self.next_fill[i + 1]
+        self.initial_ranges = list(self.ranges)
+        self.next_called = False
+
+    def reset(self):
+        # Undoes the next() calls, so the manager can be reused for another solve of the same line.
+        self.ranges = list(self.initial_ranges)
+        self.stops = [rng.get_stop_index() for rng in self.ranges]
         self.next_called = False
 
     def __getitem__(self, item):
@@ -174,15 +239,22 @@ class RangesManager:
 
     def __setitem__(self, key, value):
         self.ranges[key] = value
+        self.stops[key] = value.get_stop_index()
 
     def __len__(self):
         return len(self.ranges)
 
     def __contains__(self, item):
-        for rng in self.ranges:
-            if item in rng:
-                return True
-        return False
+        # Free cells before the first range were dropped by next().
+        return bool(self.ranges) and self.ranges[0].get_start_index() <= item < len(self.codes) and \
+            self.next_free[item] == item
+
+    def find_range(self, index: int):
+        # Position of the first range that ends after index (len(self) if there is none).
+        return bisect_right(self.stops, index)
+
+    def get_next_fill(self, index: int):
+        return self.next_fill[index] if index < len(self.codes) else len(self.codes)
 
     def next(self):
         self.next_called = True
@@ -192,6 +264,7 @@ class RangesManager:
             self[0] = RangeInfo(self.ranges[0][1:])
         else:
             del self.ranges[0]
+            del self.stops[0]
         return not self.is_empty()
 
     def is_empty(self):
@@ -222,27 +295,31 @@ class RowDisqualifier:
 
 
 class RowAnalyzer:
-    def __init__(self, row: CellRow, instructions: RowInstructions):
+    def __init__(self, row: CellRow, instructions: RowInstructions, range_manager: RangesManager = None):
+        # A range manager built for the same line state can be passed in, to share it between analyzers.
         self.row = row
-        self.range_manager = RangesManager(row)
+        if range_manager is None:
+            range_manager = RangesManager(row)
+        self.range_manager = range_manager
+        self.codes = range_manager.codes
         self.instructions = instructions
         self.left_most_ranges = []
-        self.is_solvable = self.can_solution_be_found_(0, self.instructions)
+        self.is_solvable = self.can_solution_be_found_(0, 0)
 
     def find_left_most_range_for_instruction(self, index: int, length: int):
         start_index = index
-        for rng in self.range_manager:
-            if rng.get_stop_index() <= index:
-                continue
+        ranges = self.range_manager.ranges
+        for position in range(self.range_manager.find_range(index), len(ranges)):
+            rng = ranges[position]
             start_index = max(start_index, rng.get_start_index())
             left_most_range = range(start_index, start_index + length)
             if left_most_range not in rng:
                 if self.is_there_fill_in_range(left_most_range, rng):
                     return None
                 continue
-            while left_most_range.stop < len(self.row) and self.row[left_most_range.stop].get_state() == CellState.FILL:
+            while left_most_range.stop < len(self.codes) and self.codes[left_most_range.stop] == FILL_CODE:
                 # Can the range be advanced by one?
-                if self.row[left_most_range.start].get_state() == CellState.FILL:
+                if self.codes[left_most_range.start] == FILL_CODE:
                     # Range cannot be advanced, as it means the first filled cell is out of this range, which should be
                     # the left most range.
                     return None
@@ -279,33 +356,32 @@ class RowAnalyzer:
     def get_next_range(rng: range):
         return range(rng.start + 1, rng.stop + 1)
 
-    def can_solution_be_found_(self, location_index: int, instructions: RowInstructions):
-        if instructions is None or len(instructions) == 0:
+    def can_solution_be_found_(self, location_index: int, offset: int):
+        # Places the instructions from offset onward, starting at location_index.
+        if offset == len(self.instructions):
             return not self.is_there_fill_in_remainder(location_index)
-        for start_index in range(location_index, len(self.row) - instructions[0] + 1):
+        length = self.instructions[offset]
+        # The remaining instructions must fit after the start.
+        for start_index in range(location_index, len(self.codes) - self.instructions.get_min_length(offset) + 1):
             if start_index not in self.range_manager:
                 continue
-            left_most_range = self.find_left_most_range_for_instruction(start_index, instructions[0])
+            left_most_range = self.find_left_most_range_for_instruction(start_index, length)
             if left_most_range is None:
                 return False
             self.left_most_ranges.append(left_most_range)
-            if self.can_solution_be_found_(left_most_range.stop + 1, instructions.get_next()):
+            if self.can_solution_be_found_(left_most_range.stop + 1, offset + 1):
                 return True
             del self.left_most_ranges[-1]
-            if self.row[left_most_range[0]].get_state() == CellState.FILL:
+            if self.codes[left_most_range[0]] == FILL_CODE:
                 return False
         return False
 
-    def is_there_fill_in_range(self, left_most_range, rng: range):
-        for index in left_most_range:
-            if index == len(self.row) or index not in rng:
-                return False
-            if self.row[index].get_state() == CellState.FILL:
-                return True
-        return False
+    def is_there_fill_in_range(self, left_most_range, rng: RangeInfo):
+        # Only the part of the range inside rng counts.
+        if left_most_range.start not in rng:
+            return False
+        stop = min(left_most_range.stop, rng.get_stop_index())
+        return self.range_manager.get_next_fill(left_most_range.start) < stop
 
     def is_there_fill_in_remainder(self, start_index: int):
-        for cell in self.row[start_index:]:
-            if cell.get_state() == CellState.FILL:
-                return True
-        return False
+        return self.range_manager.get_next_fill(start_index) < len(self.codes)
@@ -0,0 +1,14 @@
+from game.benchmark import random_board
+from game.board.board import Board
+from game.board.cell import RowInstructions
+
+# The random boards are the benchmark's, so the tests and the benchmark never build different ones.
+__all__ = ['random_board', 'ambiguous_blocks_board']
+
+
+def ambiguous_blocks_board(blocks: int):
+    # Every 2x2 block (separated by empty lines) has two solutions, so each block needs its own guess.
+    size = 3 * blocks
+    instructions = [[1] * blocks if line % 3 != 2 else [] for line in range(size)]
+    return Board([RowInstructions.from_list(ins) for ins in instructions],
+                 [RowInstructions.from_list(ins) for ins in instructions])
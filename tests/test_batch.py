@@ -0,0 +1,105 @@
+import json
+import os
+from time import time
+
+import pytest
+
+from game.batch import find_puzzles, run_batch, main, grade_puzzle, solve_puzzle, PuzzleTask, SOLVED, ERROR, TIMEOUT
+from game.benchmark import random_board
+from game.board.board import Board
+from game.board.instructions_utils import write_puzzles
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def test_find_puzzles():
+    instructions_dir = os.path.join(DATA_DIR, 'instructions')
+    assert [os.path.basename(path) for path in find_puzzles([instructions_dir])] == ['1.ins', '2.ins', '3.ins']
+    images = find_puzzles([os.path.join(DATA_DIR, 'images', 'N*.png')])
+    assert [os.path.basename(path) for path in images] == ['N2.png', 'N3.png']
+
+
+def test_run_batch(tmp_path):
+    inputs = [os.path.join(DATA_DIR, 'instructions'), os.path.join(DATA_DIR, 'images', '1.png')]
+    records = run_batch(inputs, str(tmp_path), processes=2)
+    assert len(records) == 4
+    for record in records:
+        assert record['status'] == SOLVED
+        assert os.path.isfile(record['output'])
+        assert record['steps'] > 0 and record['ms'] >= 0
+    with open(os.path.join(str(tmp_path), 'summary.jsonl')) as fh:
+        summary = [json.loads(line) for line in fh]
+    assert sorted(record['name'] for record in summary) == ['1', '1', '2', '3']
+    # 1.ins and 1.png have the same name, but not the same output.
+    assert sorted(os.path.basename(record['output']) for record in records) == \
+        ['images__1.png.png', 'instructions__1.ins.png', 'instructions__2.ins.png', 'instructions__3.ins.png']
+
+
+def test_bad_puzzle_is_reported(tmp_path):
+    bad_file = os.path.join(str(tmp_path), 'bad.ins')
+    with open(bad_file, 'w') as fh:
+        fh.write('1 x\nCOL\n1\n')
+    output_dir = os.path.join(str(tmp_path), 'out')
+    assert main([bad_file, '-o', output_dir, '-p', '1']) == 1
+    with open(os.path.join(output_dir, 'summary.jsonl')) as fh:
+        record = json.loads(fh.readline())
+    assert record['status'] == ERROR
+    assert 'ValueError' in record['error']
+
+
+def test_run_batch_on_multi_puzzle_file(tmp_path):
+    puzzles = []
+    for name in ['1', '2']:
+        board = Board.from_instruction_file(os.path.join(DATA_DIR, 'instructions', name + '.ins'))
+        puzzles.append(('puzzle-' + name, board.row_instructions, board.column_instructions))
+    file_path = os.path.join(str(tmp_path), 'corpus.puzzles.gz')
+    write_puzzles(file_path, puzzles)
+    records = run_batch([str(tmp_path)], os.path.join(str(tmp_path), 'out'), processes=2, grade=True)
+    assert sorted(record['name'] for record in records) == ['puzzle-1', 'puzzle-2']
+    assert all(record['grade'] == 'line-solvable' for record in records)
+    assert all(record['status'] == SOLVED and record['path'] == file_path for record in records)
+
+
+def test_same_puzzle_names_get_their_own_outputs(tmp_path):
+    board = Board.from_instruction_file(os.path.join(DATA_DIR, 'instructions', '1.ins'))
+    for directory in ['a', 'b c']:
+        os.makedirs(os.path.join(str(tmp_path), directory))
+        write_puzzles(os.path.join(str(tmp_path), directory, 'corpus.puzzles'),
+                      [('first', board.row_instructions, board.column_instructions)])
+    output_dir = os.path.join(str(tmp_path), 'out')
+    records = run_batch([os.path.join(str(tmp_path), '*', '*.puzzles')], output_dir, processes=1)
+    assert sorted(os.path.basename(record['output']) for record in records) == \
+        ['a__corpus.puzzles__first.png', 'b_c__corpus.puzzles__first.png']
+    assert all(os.path.isfile(record['output']) for record in records)
+
+
+def test_bad_multi_puzzle_file_is_reported(tmp_path):
+    board = Board.from_instruction_file(os.path.join(DATA_DIR, 'instructions', '1.ins'))
+    write_puzzles(os.path.join(str(tmp_path), 'good.puzzles'),
+                  [('good', board.row_instructions, board.column_instructions)])
+    with open(os.path.join(str(tmp_path), 'bad.puzzles'), 'w') as fh:
+        fh.write('PUZZLE first\n1\nCOL\n1\nEND\nPUZZLE second\n1 x\nCOL\n1\nEND\n')
+    records = run_batch([str(tmp_path)], os.path.join(str(tmp_path), 'out'), processes=1)
+    statuses = sorted((record['name'], record['status']) for record in records)
+    assert statuses == [('bad', ERROR), ('first', SOLVED), ('good', SOLVED)]
+    error, = [record for record in records if record['status'] == ERROR]
+    assert error['path'] == os.path.join(str(tmp_path), 'bad.puzzles')
+    assert 'second' in error['error']
+
+
+def test_grading_is_bounded_by_the_timeout():
+    task = PuzzleTask('random', '.', 'probing', True, 0.01, grade=True)
+    assert grade_puzzle(random_board(20, 0.5, 2), task, time() + 0.01) == {'grade': TIMEOUT}
+    assert grade_puzzle(random_board(20, 0.5, 2), task, time() - 1) == {'grade': TIMEOUT}
+    assert grade_puzzle(random_board(5, 0.5, 0), task)['grade'] != TIMEOUT
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_timeout_covers_solving_and_grading(tmp_path, seed):
+    board = random_board(30, 0.5, seed)
+    instructions = ([list(ins) for ins in board.row_instructions], [list(ins) for ins in board.column_instructions])
+    task = PuzzleTask('random', str(tmp_path), 'probing', True, 0.5, 'random', instructions, grade=True)
+    start = time()
+    record = solve_puzzle(task)
+    assert time() - start < 0.75
+    assert record['status'] in (SOLVED, TIMEOUT) and 'grade' in record
@@ -0,0 +1,40 @@
+import copy
+import os
+
+from game.benchmark import random_board, default_corpus, run_benchmark, compare, save_results, load_results, \
+    main, SOLVED
+
+
+def test_random_boards_are_reproducible():
+    first, second = random_board(10, 0.5, 3), random_board(10, 0.5, 3)
+    assert first.row_instructions == second.row_instructions
+    assert first.column_instructions == second.column_instructions
+    assert first.row_instructions != random_board(10, 0.5, 4).row_instructions
+
+
+def test_run_and_compare(tmp_path):
+    puzzles = [puzzle for puzzle in default_corpus([5], [0.5]) if puzzle.name in ['heart.png', 'random-5-0.5-0']]
+    results = run_benchmark(['analyze', 'iterative'], puzzles, repeats=3)
+    assert len(results['records']) == 4
+    for record in results['records']:
+        assert record['status'] == SOLVED
+        assert record['runs'] == 3
+        assert record['min_ms'] <= record['median_ms']
+        assert record['peak_kb'] > 0
+    file_path = os.path.join(str(tmp_path), 'results.json')
+    save_results(results, file_path)
+    assert compare(load_results(file_path), results) == []
+
+    slower = copy.deepcopy(results)
+    slower['records'][0]['median_ms'] = results['records'][0]['median_ms'] * 2 + 10
+    slower['records'][1]['status'] = 'timeout'
+    regressions = compare(slower, results)
+    assert len(regressions) == 2
+    assert 'timeout' in regressions[1]
+
+
+def test_cli_exit_code(tmp_path):
+    output = os.path.join(str(tmp_path), 'results.json')
+    args = ['-o', output, '-s', 'iterative', '-r', '1', '--sizes', '5', '--densities', '0.5', '--no-memory']
+    assert main(args) == 0
+    assert main(args + ['-b', output, '--tolerance', '100']) == 0
@@ -1,7 +1,15 @@
+import os
+import random
+import subprocess
+import sys
+
+import numpy as np
 import pytest
 
-from game.board.board import Board
-from game.board.cell import CellState, Location, Cell, CellRow, RowInstructions
+from game.board.board import Board, CellTable
+from game.board.cell import CellState, Location, Cell, CellRow, RowInstructions, UNSET_CODE, FILL_CODE, NO_FILL_CODE
+from game.board.image_utils import run_lengths
+from game.board.packed_table import PackedCellTable
 
 BOARD = 'board'
 ROWS = 'rows'
@@ -169,3 +177,141 @@ def test_is_row_solved(supply_board_from_file):
     assert not board.is_row_solved(0)
     board.set_cell_state(Location(0, 0), CellState.NO_FILL)
     assert not board.is_row_solved(0)
+
+
+@pytest.mark.parametrize('table_type', [CellTable, PackedCellTable])
+def test_incremental_solved_tracking(table_type):
+    board = Board.from_file(os.path.join(os.path.dirname(__file__), 'testdata', 'img.png'), True, table_type)
+    rows, columns = board.get_size()
+    rand = random.Random(0)
+    for _ in range(500):
+        location = Location(rand.randrange(rows), rand.randrange(columns))
+        state = rand.choice([CellState.UNSET, CellState.FILL, CellState.NO_FILL])
+        if rand.random() < 0.5:
+            board.set_cell_state(location, state)
+        elif location.row % 2:
+            board.get_row(location.row)[location.column].set_state(state)
+        else:
+            board.get_column(location.column).reverse()[rows - 1 - location.row].set_state(state)
+        for row in range(rows):
+            assert board.is_row_solved(row) == Board.is_row_solved_(board.get_row(row), board.row_instructions[row])
+            assert board.is_row_complete(row) == board.get_row(row).is_fully_set()
+        for column in range(columns):
+            assert board.is_column_solved(column) == \
+                   Board.is_row_solved_(board.get_column(column), board.column_instructions[column])
+    for row in range(rows):
+        for column in range(columns):
+            board.set_cell_state(Location(row, column), board.solution_table.get_cell_state(Location(row, column)))
+    assert board.is_board_solved()
+    assert board.is_board_complete()
+    board.set_cell_state(Location(0, 0), CellState.UNSET)
+    assert not board.is_board_complete()
+    assert not board.is_board_solved()
+
+
+@pytest.mark.parametrize('table_type', [CellTable, PackedCellTable])
+def test_trail_backtracking(table_type):
+    board = Board.from_file(os.path.join(os.path.dirname(__file__), 'testdata', 'img.png'), True, table_type)
+    board.set_cell_state(Location(0, 0), CellState.FILL)
+    assert board.trail == []
+    assert board.push_level() == 1
+    board.set_cell_state(Location(0, 1), CellState.FILL)
+    board.get_column(2)[3].set_state(CellState.NO_FILL)
+    assert board.push_level() == 2
+    board.set_cell_state(Location(0, 0), CellState.NO_FILL)
+    board.set_cell_state(Location(5, 5), CellState.FILL)
+    assert len(board.trail) == 4
+    steps = board.get_steps()
+    board.backtrack_to(1)
+    assert board.get_level() == 1
+    assert board.get_cell_state(Location(0, 0)) == CellState.FILL
+    assert board.get_cell_state(Location(5, 5)) == CellState.UNSET
+    assert board.get_cell_state(Location(3, 2)) == CellState.NO_FILL
+    assert board.get_steps() == steps
+    board.backtrack_to(0)
+    assert board.get_level() == 0
+    assert board.trail == []
+    assert board.get_cell_state(Location(0, 1)) == CellState.UNSET
+    assert board.get_cell_state(Location(3, 2)) == CellState.UNSET
+    assert board.is_row_complete(0) is False
+    assert board.unset_cells == 99
+
+
+@pytest.mark.parametrize('image', ['1.png', 'N3.png', 'heart.png', 'maayan.bw.small.png'])
+def test_image_clues_match_solution(image):
+    board = Board.from_file(os.path.join(os.path.dirname(__file__), '..', 'data', 'images', image), True)
+    solution = board.solution_table
+    assert board.row_instructions == [RowInstructions(solution.get_row(row)) for row in range(solution.rows)]
+    assert board.column_instructions == [RowInstructions(solution.get_column(column))
+                                         for column in range(solution.columns)]
+
+
+def test_run_lengths():
+    filled = np.array([[0, 0, 0, 0], [1, 1, 1, 1], [1, 0, 1, 1], [0, 1, 0, 0]], dtype=bool)
+    assert run_lengths(filled) == [[], [4], [1, 2], [1]]
+    assert run_lengths(filled.T) == [[2], [1, 1], [2], [2]]
+
+
+def test_cell_codes():
+    cell = Cell()
+    assert not hasattr(cell, '__dict__')
+    assert cell.get_code() == UNSET_CODE and cell.get_state() == CellState.UNSET and cell.location is None
+    cell.set_state(CellState.FILL)
+    assert cell.code == FILL_CODE and cell.state == CellState.FILL and cell.to_bool() is True
+    assert cell == Cell(CellState.FILL)
+    row = CellRow([Cell(CellState.NO_FILL), cell, Cell()])
+    assert row.get_codes() == [NO_FILL_CODE, FILL_CODE, UNSET_CODE]
+    assert row.encode() == bytes([NO_FILL_CODE, FILL_CODE, UNSET_CODE])
+
+
+@pytest.mark.parametrize('table_type', [CellTable, PackedCellTable])
+def test_table_cells_report_location(table_type):
+    table = table_type(3, 4)
+    cell = table.get_column(2)[1]
+    assert cell.get_location() == Location(1, 2)
+    cell.set_state(CellState.NO_FILL)
+    assert table.get_row(1).get_codes() == [UNSET_CODE, UNSET_CODE, NO_FILL_CODE, UNSET_CODE]
+    assert table.get_cell_steps()[1 * 4 + 2] == 1
+
+
+def test_row_instructions_min_lengths():
+    instructions = RowInstructions.from_list([3, 1, 2])
+    assert instructions.get_instructions() == (3, 1, 2)
+    assert [instructions.get_min_length(offset) for offset in range(4)] == [8, 4, 2, 0]
+    assert [instructions.get_prefix_min_length(count) for count in range(4)] == [0, 3, 5, 8]
+    assert RowInstructions.from_list([]).get_min_length() == 0
+    reversed_instructions = instructions.reverse()
+    assert reversed_instructions.get_instructions() == (2, 1, 3)
+    assert instructions.reverse() is reversed_instructions and reversed_instructions.reverse() is instructions
+    assert instructions.get_next() == RowInstructions.from_list([1, 2])
+    assert RowInstructions(CellRow.from_bool([True, True, False, None, True])) == RowInstructions.from_list([2, 1])
+    assert hash(instructions) == hash(RowInstructions.from_list([3, 1, 2]))
+
+
+def test_line_views():
+    table = CellTable(3, 4)
+    table.set_cell_state(Location(1, 2), CellState.FILL)
+    table.set_cell_state(Location(2, 2), CellState.NO_FILL)
+    row, column = table.get_row(1), table.get_column(2)
+    assert len(row) == 4 and len(column) == 3
+    assert row[2] is column[1] is table.table[1][2]
+    assert column.get_codes() == [UNSET_CODE, FILL_CODE, NO_FILL_CODE]
+    reversed_column = column.reverse()
+    assert reversed_column.get_codes() == [NO_FILL_CODE, FILL_CODE, UNSET_CODE]
+    assert reversed_column[-1] is table.table[0][2]
+    assert reversed_column.reverse().get_codes() == column.get_codes()
+    assert column[1:].get_codes() == [FILL_CODE, NO_FILL_CODE]
+    assert reversed_column[::2].get_codes() == [NO_FILL_CODE, UNSET_CODE]
+    assert [cell.get_location() for cell in row.reverse()] == [Location(1, column) for column in range(3, -1, -1)]
+    # Writes through a view reach the table.
+    reversed_column.set_state(2, CellState.NO_FILL)
+    assert table.get_cell_state(Location(0, 2)) == CellState.NO_FILL
+    assert column.is_fully_set() and not row.is_fully_set()
+
+
+def test_opencv_is_imported_only_for_preprocessing():
+    # Run in a process of its own, since other tests import OpenCV.
+    code = 'import sys, game.board.board, game.batch; print("cv2" in sys.modules)'
+    root = os.path.join(os.path.dirname(__file__), '..')
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == 'False'
@@ -0,0 +1,101 @@
+from game.benchmark import random_board
+from game.board.board import Board
+from game.board.cell import RowInstructions, UNSET_CODE
+from game.solver.budget import Budget, BudgetExceeded, SOLVED, UNSOLVED, GAVE_UP, TIME_LIMIT, GUESS_LIMIT, \
+    PROPAGATION_LIMIT
+from game.solver.guess_solver import GuessSolver, BestInfoGuessSolver
+from game.solver.instrumentation import LINE_SOLVES
+from game.solver.iterative_solver import IterativeGuessSolver, IterativeProbingGuessSolver
+from tests.boards import ambiguous_blocks_board
+
+
+def test_get_exceeded():
+    assert Budget().get_exceeded(100.0, 100, 100) is None
+    assert Budget(max_seconds=1.0).get_exceeded(1.5, 0, 0) == TIME_LIMIT
+    assert Budget(max_guesses=2).get_exceeded(0.0, 1, 0) is None
+    assert Budget(max_guesses=2).get_exceeded(0.0, 2, 0) == GUESS_LIMIT
+    assert Budget(max_propagation_steps=10).get_exceeded(0.0, 0, 11) == PROPAGATION_LIMIT
+
+
+def test_within_budget():
+    board = ambiguous_blocks_board(3)
+    result = IterativeGuessSolver(board, use_line_solver=True).solve_within(Budget(max_seconds=10, max_guesses=100))
+    assert result.status == SOLVED and result.limit is None
+    assert not result.gave_up()
+    assert result.codes == board.encode_states()
+    assert result.metrics.solved
+
+
+def test_unsolvable_within_budget():
+    board = Board([RowInstructions.from_list([2]), RowInstructions.from_list([])],
+                  [RowInstructions.from_list([2]), RowInstructions.from_list([])])
+    result = IterativeGuessSolver(board, use_line_solver=True).solve_within(Budget(max_guesses=100))
+    assert result.status == UNSOLVED
+
+
+def test_guess_limit():
+    board = ambiguous_blocks_board(4)
+    result = IterativeGuessSolver(board, use_line_solver=True).solve_within(Budget(max_guesses=2))
+    assert result.gave_up() and result.limit == GUESS_LIMIT
+    assert result.metrics.guesses == 2
+    # The partial grid: the blocks that were guessed are set, the others are not.
+    assert len(result.codes) == 12 * 12
+    assert UNSET_CODE in result.codes and any(code != UNSET_CODE for code in result.codes)
+
+
+def test_propagation_limit():
+    board = ambiguous_blocks_board(4)
+    solver = IterativeGuessSolver(board, use_line_solver=True)
+    result = solver.solve_within(Budget(max_propagation_steps=1))
+    assert result.status == GAVE_UP and result.limit == PROPAGATION_LIMIT
+    assert result.metrics.counters[LINE_SOLVES] > 1
+    assert result.metrics.guesses == 0
+
+
+def test_time_limit_stops_recursion():
+    # The plain guess solver needs far longer than the budget on this board.
+    board = random_board(12, 0.5, 0)
+    solver = GuessSolver(board)
+    result = solver.solve_within(Budget(max_seconds=0.2))
+    assert result.status == GAVE_UP and result.limit == TIME_LIMIT
+    assert solver.duration_in_milli_seconds < 2000
+    assert not board.is_board_solved()
+
+
+def test_search_raises():
+    solver = IterativeGuessSolver(ambiguous_blocks_board(4), use_line_solver=True)
+    solver.budget = Budget(max_guesses=1)
+    solver.start_count_time_()
+    try:
+        solver.search_()
+        assert False, 'The budget should have run out'
+    except BudgetExceeded as e:
+        assert e.limit == GUESS_LIMIT
+    assert solver.gave_up == GUESS_LIMIT
+
+
+def test_time_limit_stops_guess_location():
+    # A single guess location of the most info locator runs far longer than the budget on this board.
+    board = random_board(15, 0.5, 0)
+    solver = BestInfoGuessSolver(board)
+    result = solver.solve_within(Budget(max_seconds=0.2))
+    assert result.status == GAVE_UP and result.limit == TIME_LIMIT
+    assert solver.duration_in_milli_seconds < 1000
+    # The open levels are closed, and the board keeps only what holds before the first guess.
+    assert board.get_level() == 0
+    assert result.codes == board.encode_states()
+
+
+def test_time_limit_stops_probing():
+    board = random_board(20, 0.5, 2)
+    solver = IterativeProbingGuessSolver(board, use_line_solver=True)
+    result = solver.solve_within(Budget(max_seconds=0.05))
+    assert result.status == GAVE_UP and result.limit == TIME_LIMIT
+    assert solver.duration_in_milli_seconds < 1000
+    assert board.get_level() == 0 and not solver.stack
+
+
+def test_propagation_limit_counts_row_analyzers():
+    result = GuessSolver(random_board(12, 0.5, 0)).solve_within(Budget(max_propagation_steps=100))
+    assert result.status == GAVE_UP and result.limit == PROPAGATION_LIMIT
+    assert result.metrics.counters[LINE_SOLVES] <= 102
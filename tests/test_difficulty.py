@@ -0,0 +1,46 @@
+import os
+
+from game.board.board import Board
+from game.board.cell import RowInstructions
+from game.solver.difficulty import DifficultyGrader, LINE_SOLVABLE, PROBING_SOLVABLE, NEEDS_SEARCH, UNSOLVABLE
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def test_line_solvable():
+    board = Board.from_file(os.path.join(DATA_DIR, 'images', 'N3.png'))
+    grade = DifficultyGrader(board).grade()
+    assert grade.grade == LINE_SOLVABLE
+    assert grade.propagation_rounds >= 1
+    assert grade.lines_solved >= 20
+    assert grade.unset_after_propagation == 0
+    assert grade.guesses == grade.probes == 0
+    assert board.is_board_solved()
+
+
+def test_probing_solvable():
+    board = Board([RowInstructions.from_list(ins) for ins in [[2], [1, 1], [], [1]]],
+                  [RowInstructions.from_list(ins) for ins in [[1], [1, 1], [1], [1]]])
+    grade = DifficultyGrader(board).grade()
+    assert grade.grade == PROBING_SOLVABLE
+    assert grade.unset_after_propagation > 0
+    assert grade.probes > 0 and grade.deductions > 0
+    assert grade.guesses == 0
+    assert board.is_board_solved()
+
+
+def test_needs_search():
+    instructions = [RowInstructions.from_list(ins) for ins in [[1, 1], [1, 1], [], [1, 1], [1, 1], []]]
+    board = Board(instructions, instructions)
+    grade = DifficultyGrader(board).grade()
+    assert grade.grade == NEEDS_SEARCH
+    assert grade.guesses >= 4 and grade.max_depth >= 4
+    assert grade.get_branching_factor() >= 1
+    assert board.is_board_solved()
+    assert DifficultyGrader(Board(instructions, instructions), search=False).grade().guesses == 0
+
+
+def test_unsolvable():
+    board = Board([RowInstructions.from_list([1]), RowInstructions.from_list([])],
+                  [RowInstructions.from_list([]), RowInstructions.from_list([2])])
+    assert DifficultyGrader(board).grade().grade == UNSOLVABLE
@@ -0,0 +1,52 @@
+from game.board.board import Board
+from game.board.cell import CellState, Location, RowInstructions
+from game.solver.iterative_solver import IterativeProbingGuessSolver
+from game.solver.solvertools.guesslocator import Guess, ProbingGuessLocator, MostInfoGuessLocator
+from game.solver.solvertools.parallel_guesslocator import ParallelMostInfoGuessLocator
+from tests.boards import random_board
+
+NO_GUESS = Guess(Location(-1, -1), CellState.FILL)
+
+
+def test_contradicting_probe_is_deduced():
+    # Rows [1, 1] / [] / [1] and columns [1] / [] / [1, 1]: only (0, 0), (0, 2) and (2, 2) can be filled, but line
+    # solving alone cannot place the first row.
+    board = Board([RowInstructions.from_list([1, 1]), RowInstructions.from_list([]), RowInstructions.from_list([1])],
+                  [RowInstructions.from_list([1]), RowInstructions.from_list([]), RowInstructions.from_list([1, 1])])
+    locator = ProbingGuessLocator(board, True)
+    assert locator.get_next_guess(NO_GUESS) is None
+    assert board.is_board_solved()
+    assert locator.deductions > 0
+
+
+def test_probes_are_cached_until_lines_change():
+    board = random_board(12, 0.5, 0)
+    locator = ProbingGuessLocator(board, True)
+    locator.propagator.push_all()
+    assert locator.propagator.propagate()
+    guess = locator.get_next_guess(NO_GUESS)
+    probes_run = locator.probes_run
+    assert locator.get_next_guess(NO_GUESS) == guess
+    assert locator.probes_run == probes_run
+    board.push_level()
+    board.set_cell_state(guess.location, guess.state)
+    locator.get_next_guess(guess)
+    assert locator.probes_run > probes_run
+
+
+def test_probing_solver():
+    for seed in range(5):
+        board = random_board(15, 0.5, seed)
+        solver = IterativeProbingGuessSolver(board, True)
+        solver.solve()
+        assert board.is_board_solved()
+
+
+def test_parallel_most_info_locator_matches_sequential():
+    board = random_board(8, 0.5, 3)
+    board.set_cell_state(Location(0, 0), CellState.FILL)
+    with ParallelMostInfoGuessLocator(board, True, processes=2) as parallel_locator:
+        assert parallel_locator.get_next_guess(NO_GUESS) == MostInfoGuessLocator(board, True).get_next_guess(NO_GUESS)
+        board.set_cell_state(Location(7, 7), CellState.NO_FILL)
+        assert parallel_locator.get_next_guess(NO_GUESS) == MostInfoGuessLocator(board, True).get_next_guess(NO_GUESS)
+    assert parallel_locator.pool is None
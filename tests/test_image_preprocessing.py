@@ -0,0 +1,76 @@
+import os
+import shutil
+
+import numpy as np
+
+from game.board.board import Board
+from game.board.image_preprocessing import PreprocessOptions, binarize, dither, remove_isolated_pixels, \
+    preprocess_image, preprocess_files, main
+from game.board.image_utils import image_to_bool_array
+
+IMAGES_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'images')
+
+
+def test_binarize():
+    image = np.array([[0, 100, 200, 255]], dtype=np.uint8)
+    assert binarize(image, 100).tolist() == [[True, True, False, False]]
+    # Otsu splits the two clusters.
+    image = np.array([[10, 20, 30, 220, 230, 240]], dtype=np.uint8)
+    assert binarize(image, None).tolist() == [[True, True, True, False, False, False]]
+
+
+def test_dither_keeps_shades():
+    image = np.full((8, 8), 128, dtype=np.uint8)
+    assert dither(image).sum() == 32
+    assert dither(np.zeros((8, 8), dtype=np.uint8)).all()
+    assert not dither(np.full((8, 8), 255, dtype=np.uint8)).any()
+
+
+def test_remove_isolated_pixels():
+    filled = np.zeros((5, 5), dtype=bool)
+    filled[0, 0] = True
+    filled[2:4, 2:4] = True
+    filled[4, 0] = True
+    filled[4, 1] = True
+    # Only the lone filled corner, and the empty pixel surrounded by filled ones, are flipped.
+    filled[0:3, 2:5] = True
+    filled[1, 3] = False
+    expected = filled.copy()
+    expected[0, 0] = False
+    expected[1, 3] = True
+    assert (remove_isolated_pixels(filled) == expected).all()
+
+
+def test_board_from_preprocessed_image():
+    options = PreprocessOptions(size=(70, 77), threshold=200, denoise=True)
+    board = Board.from_file(os.path.join(IMAGES_DIR, 'maayan.greyscale.jpeg'), True, preprocess_options=options)
+    assert board.get_size() == (77, 70)
+    filled = preprocess_image(os.path.join(IMAGES_DIR, 'maayan.greyscale.jpeg'), options)
+    assert board.solution_table.encode() == bytes((2 - filled).ravel().tolist())
+
+
+def test_preprocess_files(tmp_path):
+    images = [os.path.join(IMAGES_DIR, name) for name in ['maayan.greyscale.jpeg', 'maayan.png']]
+    options = PreprocessOptions(size=(40, 30), threshold=None)
+    output_paths = preprocess_files(images, str(tmp_path), options, processes=2)
+    assert [os.path.basename(path) for path in output_paths] == ['maayan.greyscale.jpeg.bw.png', 'maayan.png.bw.png']
+    for image, output_path in zip(images, output_paths):
+        assert (image_to_bool_array(output_path) == preprocess_image(image, options)).all()
+
+
+
+def test_same_image_names_get_their_own_outputs(tmp_path):
+    images = []
+    for directory in ['a', 'b c']:
+        os.makedirs(str(tmp_path / directory))
+        images.append(str(tmp_path / directory / 'heart.png'))
+        shutil.copy(os.path.join(IMAGES_DIR, 'heart.png'), images[-1])
+    output_paths = preprocess_files(images, str(tmp_path / 'out'), processes=1)
+    assert [os.path.basename(path) for path in output_paths] == ['a__heart.png.bw.png', 'b_c__heart.png.bw.png']
+    assert all(os.path.isfile(path) for path in output_paths)
+
+
+def test_cli(tmp_path, capsys):
+    assert main([os.path.join(IMAGES_DIR, 'heart.png'), '-o', str(tmp_path), '--otsu']) == 0
+    output_path = capsys.readouterr().out.strip()
+    assert (image_to_bool_array(output_path) == image_to_bool_array(os.path.join(IMAGES_DIR, 'heart.png'))).all()
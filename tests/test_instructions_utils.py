@@ -0,0 +1,52 @@
+import gzip
+import os
+
+import pytest
+
+from game.board.board import Board
+from game.board.instructions_utils import instructions_from_file, read_puzzles, write_puzzles
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def bundled_puzzles():
+    for name in ['1', '2', '3']:
+        row_instructions, column_instructions = instructions_from_file(
+            os.path.join(DATA_DIR, 'instructions', name + '.ins'))
+        yield name, row_instructions, column_instructions
+
+
+@pytest.mark.parametrize('file_name', ['bundled.puzzles', 'bundled.puzzles.gz'])
+def test_write_and_read_puzzles(tmp_path, file_name):
+    file_path = os.path.join(str(tmp_path), file_name)
+    assert write_puzzles(file_path, bundled_puzzles()) == 3
+    puzzles = read_puzzles(file_path)
+    for expected, actual in zip(bundled_puzzles(), puzzles):
+        assert expected == actual
+    assert next(puzzles, None) is None
+    if file_name.endswith('.gz'):
+        with gzip.open(file_path, 'rt') as fh:
+            assert fh.readline() == 'PUZZLE 1\n'
+
+
+def test_empty_instructions_and_comments(tmp_path):
+    file_path = os.path.join(str(tmp_path), 'small.puzzles')
+    with open(file_path, 'w') as fh:
+        fh.write('# two puzzles\n\nPUZZLE first\n1\n# an empty row\n0\nCOL\n1\n0\nEND\n\nPUZZLE second one\n2\nCOL\n'
+                 '1\n  # comments may be indented\n1\nEND\n')
+    boards = list(Board.from_puzzle_file(file_path))
+    assert [name for name, _ in boards] == ['first', 'second one']
+    first = boards[0][1]
+    assert first.get_size() == (2, 2)
+    assert list(first.row_instructions[1]) == []
+    assert boards[1][1].get_size() == (1, 2)
+
+
+@pytest.mark.parametrize('content', ['1\nCOL\n1\nEND\n', 'PUZZLE a\n1\nEND\n', 'PUZZLE a\n1\nCOL\n1\n',
+                                     'PUZZLE a\n1\n\nCOL\n1\n0\nEND\n', 'PUZZLE a\n1\nCOL\n1 x\nEND\n'])
+def test_malformed_puzzle_files(tmp_path, content):
+    file_path = os.path.join(str(tmp_path), 'bad.puzzles')
+    with open(file_path, 'w') as fh:
+        fh.write(content)
+    with pytest.raises(ValueError):
+        list(read_puzzles(file_path))
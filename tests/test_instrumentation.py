@@ -0,0 +1,73 @@
+from game.board.board import Board
+from game.board.cell import RowInstructions
+from game.solver.analyze_the_guess_solver import AnalyzeThenBestInfoGuessSolver
+from game.solver.guess_solver import GuessSolver
+from game.solver.instrumentation import Metrics, LINE_SOLVES, PROPAGATIONS, CONTRADICTIONS, BACKTRACKS, \
+    CACHE_HITS, CACHE_MISSES, INFO_ROUNDS, PROPAGATION_TIME, GUESS_LOCATION_TIME, ADD_INFO_TIME, GUESS_EVENT, \
+    BACKTRACK_EVENT, PROPAGATED_EVENT, SOLVED_EVENT
+from game.solver.iterative_solver import IterativeGuessSolver
+
+
+def search_board():
+    # Needs guesses, and some of them are wrong.
+    instructions = [RowInstructions.from_list(ins) for ins in [[1, 1], [1, 1], [], [1, 1], [1, 1], []]]
+    return Board(instructions, instructions)
+
+
+def test_metrics():
+    metrics = Metrics()
+    metrics.count(LINE_SOLVES)
+    metrics.count(LINE_SOLVES, 2)
+    with metrics.timer(PROPAGATION_TIME):
+        pass
+    metrics.add_time(PROPAGATION_TIME, 1.0)
+    assert metrics.get_counter(LINE_SOLVES) == 3
+    assert metrics.get_counter(BACKTRACKS) == 0
+    assert metrics.get_time(PROPAGATION_TIME) >= 1.0
+    metrics.clear()
+    assert metrics.get_counter(LINE_SOLVES) == 0 and metrics.get_time(PROPAGATION_TIME) == 0
+
+
+def test_iterative_solver_metrics():
+    solver = IterativeGuessSolver(search_board(), use_line_solver=True)
+    result = solver.solve_with_metrics()
+    assert result.solved
+    assert result.guesses == solver.get_guesses() > 0
+    assert result.counters[PROPAGATIONS] >= result.guesses
+    assert result.counters[LINE_SOLVES] > 0
+    assert result.counters.get(CONTRADICTIONS, 0) <= result.counters.get(BACKTRACKS, 0)
+    assert result.counters[CACHE_HITS] + result.counters[CACHE_MISSES] > 0
+    assert result.timers_ms[PROPAGATION_TIME] > 0 and result.timers_ms[GUESS_LOCATION_TIME] > 0
+    assert result.profile is None
+
+
+def test_listeners():
+    events = []
+    solver = IterativeGuessSolver(search_board(), use_line_solver=True)
+    solver.add_listener(lambda event, event_solver, **details: events.append((event, details)))
+    solver.solve_with_metrics()
+    names = [event for event, _ in events]
+    assert names.count(GUESS_EVENT) == solver.get_guesses()
+    assert names.count(BACKTRACK_EVENT) == solver.metrics.get_counter(BACKTRACKS)
+    assert names.count(PROPAGATED_EVENT) == solver.metrics.get_counter(PROPAGATIONS)
+    assert events[-1] == (SOLVED_EVENT, {'solved': True})
+    assert all(details['consistent'] for event, details in events if event == PROPAGATED_EVENT) == \
+        (solver.metrics.get_counter(CONTRADICTIONS) == 0)
+
+
+def test_recursive_solver_metrics():
+    solver = GuessSolver(search_board())
+    result = solver.solve_with_metrics()
+    assert result.solved
+    assert result.counters[BACKTRACKS] > 0
+    solver = AnalyzeThenBestInfoGuessSolver(search_board())
+    result = solver.solve_with_metrics()
+    assert result.solved
+    assert result.counters[INFO_ROUNDS] > 0 and result.timers_ms[ADD_INFO_TIME] > 0
+
+
+def test_profile():
+    result = IterativeGuessSolver(search_board(), use_line_solver=True).solve_with_metrics(profile=True)
+    assert result.solved
+    assert 'function calls' in result.profile
+    assert 'continue_' in result.profile
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from game.board.board import Board
+from game.board.cell import RowInstructions
+from game.solver.budget import Budget, GAVE_UP, GUESS_LIMIT
+from game.solver.iterative_solver import IterativeGuessSolver, IterativeBestInfoGuessSolver, \
+    IterativeProbingGuessSolver, IterativeParallelBestInfoGuessSolver
+from tests.boards import random_board, ambiguous_blocks_board
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+@pytest.mark.parametrize('use_line_solver', [False, True])
+def test_solves_bundled_puzzles(use_line_solver):
+    for name in ['1.ins', '2.ins', '3.ins']:
+        board = Board.from_instruction_file(os.path.join(DATA_DIR, 'instructions', name))
+        IterativeGuessSolver(board, use_line_solver=use_line_solver).solve()
+        assert board.is_board_solved()
+
+
+class NoPropagationSolver(IterativeGuessSolver):
+    def propagate_(self, info_to_add=None):
+        return True
+
+    def apply_guess_(self, guess):
+        self.board.push_level()
+        self.board.set_cell_state(guess.location, guess.state)
+        return True
+
+
+def test_backtracking():
+    # 3x3 cross, so the first guess (FILL in the corner) is wrong, and the solver has to go back up the stack.
+    instructions = [RowInstructions.from_list([1]), RowInstructions.from_list([3]), RowInstructions.from_list([1])]
+    board = Board(instructions, instructions)
+    solver = NoPropagationSolver(board)
+    solver.solve()
+    assert board.is_board_solved()
+    assert solver.get_guesses() > 9
+    assert solver.stack[0].flipped
+
+
+def test_deeper_than_recursion_limit():
+    board = ambiguous_blocks_board(20)
+    solver = IterativeGuessSolver(board, use_line_solver=True)
+    solver.solve()
+    assert board.is_board_solved()
+    assert solver.get_guesses() == 400
+    assert len(solver.stack) == 400
+
+
+def test_unsolvable_board():
+    board = Board([RowInstructions.from_list([1]), RowInstructions.from_list([])],
+                  [RowInstructions.from_list([]), RowInstructions.from_list([2])])
+    IterativeGuessSolver(board).solve()
+    assert not board.is_board_solved()
+    assert board.get_level() == 0
+
+
+def test_best_info_locator():
+    board = ambiguous_blocks_board(2)
+    IterativeBestInfoGuessSolver(board, True).solve()
+    assert board.is_board_solved()
+
+
+def test_parallel_best_info_solver_closes_its_pool():
+    board = ambiguous_blocks_board(2)
+    solver = IterativeParallelBestInfoGuessSolver(board, True, processes=2)
+    solver.solve()
+    assert board.is_board_solved()
+    assert solver.guess_locator.pool is None
+    # The budget runs out after the first guess, once the pool was started.
+    solver = IterativeParallelBestInfoGuessSolver(ambiguous_blocks_board(3), True, processes=2)
+    result = solver.solve_within(Budget(max_guesses=1))
+    assert result.status == GAVE_UP and result.limit == GUESS_LIMIT
+    assert solver.guess_locator.pool is None
+
+
+class CrashingSolver(IterativeGuessSolver):
+    def __init__(self, board, crash_after: int, **kwargs):
+        super().__init__(board, **kwargs)
+        self.crash_after = crash_after
+
+    def poll_(self):
+        self.crash_after -= 1
+        if self.crash_after < 0:
+            raise KeyboardInterrupt
+        return super().poll_()
+
+
+@pytest.mark.parametrize('solver_type', [IterativeGuessSolver, IterativeProbingGuessSolver])
+@pytest.mark.parametrize('crash_after', [2, 3, 5])
+def test_resume_from_checkpoint(tmp_path, solver_type, crash_after):
+    checkpoint_path = os.path.join(str(tmp_path), 'search.ckpt')
+    expected_board = random_board(20, 0.5, 2)
+    expected = solver_type(expected_board, use_line_solver=True)
+    expected.solve()
+    assert expected.get_guesses() > 5
+
+    board = random_board(20, 0.5, 2)
+    crashing = CrashingSolver(board, crash_after, use_line_solver=True, checkpoint_path=checkpoint_path,
+                              checkpoint_interval=0)
+    crashing.guess_locator = solver_type(board, use_line_solver=True).guess_locator
+    with pytest.raises(KeyboardInterrupt):
+        crashing.solve()
+    assert os.listdir(str(tmp_path)) == ['search.ckpt']
+
+    resumed = solver_type.resume(checkpoint_path, use_line_solver=True)
+    assert resumed.board.is_board_solved()
+    assert resumed.board.encode_states() == expected_board.encode_states()
+    assert resumed.get_guesses() == expected.get_guesses()
+    assert resumed.board.get_steps() == expected_board.get_steps()
@@ -0,0 +1,116 @@
+import itertools
+import os
+import random
+
+import pytest
+
+from game.board.board import Board
+from game.board.cell import CellRow, RowInstructions, CellState, Location
+from game.board.packed_table import PackedCellTable
+from game.solver.analyze_the_guess_solver import AnalyzeThenGuessSolver
+from game.solver.solvertools.line_cache import LineSolveCache, CacheStats
+from game.solver.solvertools.line_solver import LineSolver
+from game.solver.solvertools.solver_tools import RowInfoAdder
+
+INSTRUCTIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'instructions')
+
+
+def brute_force_agreed_states(row: CellRow, instructions: RowInstructions):
+    solutions = []
+    for candidate in itertools.product([True, False], repeat=len(row)):
+        candidate_row = CellRow.from_bool(list(candidate))
+        if not RowInstructions.is_row_solved(candidate_row, instructions):
+            continue
+        if any(cell.get_state() != CellState.UNSET and cell.to_bool() != value
+               for cell, value in zip(row, candidate)):
+            continue
+        solutions.append(candidate)
+    if not solutions:
+        return None
+    agreed_states = []
+    for values in zip(*solutions):
+        if all(values):
+            agreed_states.append(CellState.FILL)
+        elif not any(values):
+            agreed_states.append(CellState.NO_FILL)
+        else:
+            agreed_states.append(CellState.UNSET)
+    return agreed_states
+
+
+def test_simple_rows():
+    row = CellRow.from_bool([None] * 5)
+    assert LineSolver(row, RowInstructions.from_list([3])).get_agreed_states() == \
+           [CellState.UNSET, CellState.UNSET, CellState.FILL, CellState.UNSET, CellState.UNSET]
+    assert LineSolver(row, RowInstructions.from_list([1, 1, 1])).get_agreed_states() == \
+           [CellState.FILL, CellState.NO_FILL, CellState.FILL, CellState.NO_FILL, CellState.FILL]
+    assert LineSolver(row, RowInstructions.from_list([])).get_agreed_states() == [CellState.NO_FILL] * 5
+    assert not LineSolver(row, RowInstructions.from_list([1, 1, 1, 1])).get_is_solvable()
+    row = CellRow.from_bool([None, None, False, None, True])
+    assert LineSolver(row, RowInstructions.from_list([2])).get_agreed_states() == \
+           [CellState.NO_FILL, CellState.NO_FILL, CellState.NO_FILL, CellState.FILL, CellState.FILL]
+    assert not LineSolver(row, RowInstructions.from_list([3])).get_is_solvable()
+
+
+def test_finds_more_than_overlap_heuristic():
+    # The filled cell is one of the two blocks, so both of its neighbours must be empty. The left/right most overlap
+    # heuristic finds nothing here.
+    row = CellRow.from_bool([None, None, None, True, None, None])
+    instructions = RowInstructions.from_list([1, 1])
+    assert RowInfoAdder(row, instructions).add_info() == []
+    assert LineSolver(row, instructions).get_info() == [(2, CellState.NO_FILL), (4, CellState.NO_FILL)]
+    info = RowInfoAdder(row, instructions, use_line_solver=True).add_info()
+    assert [cell_info.state for cell_info in info] == [CellState.NO_FILL, CellState.NO_FILL]
+    assert RowInfoAdder(CellRow.from_bool([True, False, True]), RowInstructions.from_list([2]), True).add_info() \
+           is False
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_brute_force(seed):
+    rand = random.Random(seed)
+    for _ in range(25):
+        length = rand.randint(1, 10)
+        solution = CellRow.from_bool([rand.random() < 0.5 for _ in range(length)])
+        instructions = RowInstructions(solution)
+        if rand.random() < 0.2:
+            instructions = RowInstructions.from_list([rand.randint(1, 3) for _ in range(rand.randint(0, 3))])
+        row = CellRow.from_bool([rand.choice([None, None, True, False]) for _ in range(length)])
+        assert LineSolver(row, instructions).get_agreed_states() == brute_force_agreed_states(row, instructions)
+
+
+def test_solver_with_line_solver():
+    board = Board.from_instruction_file(os.path.join(INSTRUCTIONS_DIR, '3.ins'))
+    AnalyzeThenGuessSolver(board, use_line_solver=True).solve()
+    assert board.is_board_solved()
+
+
+def test_cache_hits_and_eviction():
+    instructions = RowInstructions.from_list([3])
+    unset_row = CellRow.from_bool([None] * 5)
+    entry_size = LineSolveCache.get_entry_size_(LineSolveCache.make_key(unset_row, instructions), bytes(5))
+    cache = LineSolveCache(max_bytes=2 * entry_size)
+    states = LineSolver(unset_row, instructions, cache).get_agreed_states()
+    assert states == LineSolver(unset_row, instructions).get_agreed_states()
+    assert LineSolver(CellRow.from_bool([None] * 5), instructions, cache).get_agreed_states() == states
+    assert cache.get_stats() == CacheStats(hits=1, misses=1, size=1, size_in_bytes=entry_size)
+    assert cache.entries[LineSolveCache.make_key(unset_row, instructions)] == bytes([0, 0, 1, 0, 0])
+    LineSolver(unset_row, RowInstructions.from_list([1]), cache)
+    assert cache.get_stats() == CacheStats(hits=1, misses=2, size=2, size_in_bytes=2 * entry_size)
+    # The least recently used entry is evicted to keep the cache within its bytes, so the first row is solved again.
+    assert not LineSolver(CellRow.from_bool([None, False, None, False, None]), instructions, cache).get_is_solvable()
+    assert cache.get_stats().size == 2 and cache.get_stats().size_in_bytes <= 2 * entry_size
+    LineSolver(unset_row, instructions, cache)
+    assert cache.get_stats().misses == 4
+    assert cache.get_stats().get_hit_rate() == 0.2
+    cache.clear()
+    assert cache.get_stats() == CacheStats(hits=0, misses=0, size=0, size_in_bytes=0)
+
+
+def test_packed_and_cell_rows_share_keys():
+    board = Board.from_instruction_file(os.path.join(INSTRUCTIONS_DIR, '1.ins'))
+    packed = Board.from_instruction_file(os.path.join(INSTRUCTIONS_DIR, '1.ins'), table_type=PackedCellTable)
+    board.set_cell_state(Location(0, 2), CellState.FILL)
+    packed.set_cell_state(Location(0, 2), CellState.FILL)
+    assert LineSolveCache.make_key(board.get_row(0), board.get_row_instructions(0)) == \
+           LineSolveCache.make_key(packed.get_row(0), packed.get_row_instructions(0))
+    assert board.get_column(2).reverse().encode() == packed.get_column(2).reverse().encode()
@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from game.board.board import Board, CellTable
+from game.board.cell import CellState, Location, FILL_CODE, NO_FILL_CODE, UNSET_CODE
+from game.board.packed_table import PackedCellTable
+
+IMAGE_PATH = os.path.join(os.path.dirname(__file__), 'testdata', 'img.png')
+BOARD = 'board'
+PACKED_BOARD = 'packed'
+
+
+@pytest.fixture
+def supply_boards():
+    return {
+        BOARD: Board.from_file(IMAGE_PATH, True),
+        PACKED_BOARD: Board.from_file(IMAGE_PATH, True, PackedCellTable),
+    }
+
+
+def test_same_instructions(supply_boards):
+    board, packed = supply_boards[BOARD], supply_boards[PACKED_BOARD]
+    assert isinstance(packed.game_table, PackedCellTable)
+    assert board.row_instructions == packed.row_instructions
+    assert board.column_instructions == packed.column_instructions
+    assert packed.solution_table == board.solution_table
+
+
+def test_get_set_cell_state(supply_boards):
+    board = supply_boards[PACKED_BOARD]
+    board.set_cell_state(Location(0, 1), CellState.FILL)
+    board.set_cell_state(Location(1, 0), CellState.NO_FILL)
+    assert board.get_cell_state(Location(0, 1)) == CellState.FILL
+    assert board.get_cell_state(Location(1, 0)) == CellState.NO_FILL
+    assert board.get_cell_state(Location(1, 1)) == CellState.UNSET
+    assert board.game_table.states[0, 1] == FILL_CODE
+    assert board.game_table.states[1, 0] == NO_FILL_CODE
+    assert board.get_steps() == 2
+    with pytest.raises(AssertionError):
+        board.get_cell_state(Location(-1, 0))
+
+
+def test_row_and_column_are_views(supply_boards):
+    board = supply_boards[PACKED_BOARD]
+    row = board.get_row(0)
+    column = board.get_column(0)
+    assert np.shares_memory(row.states, board.game_table.states)
+    assert np.shares_memory(column.reverse().states, board.game_table.states)
+    row[0].set_state(CellState.FILL)
+    assert column[0].get_state() == CellState.FILL
+    assert column.reverse()[-1].get_state() == CellState.FILL
+    assert board.get_cell_state(Location(0, 0)) == CellState.FILL
+    assert not row.is_fully_set()
+    for index in range(len(row)):
+        row.set_state(index, CellState.NO_FILL)
+    assert row.is_fully_set()
+    assert (board.game_table.states[1:] == UNSET_CODE).all()
+
+
+def test_solved_board_matches_cell_table(supply_boards):
+    board, packed = supply_boards[BOARD], supply_boards[PACKED_BOARD]
+    rows, columns = board.get_size()
+    for row in range(rows):
+        for column in range(columns):
+            state = board.solution_table.get_cell_state(Location(row, column))
+            board.set_cell_state(Location(row, column), state)
+            packed.set_cell_state(Location(row, column), state)
+    assert board.is_board_solved()
+    assert packed.is_board_solved()
+    assert board.game_table == packed.game_table
+    assert packed.game_table == board.game_table
+    assert not packed.is_there_mistake()
+
+
+def test_cell_table_compares_to_packed():
+    table = CellTable(3, 2)
+    packed = PackedCellTable(3, 2)
+    assert table == packed
+    packed.set_cell_state(Location(2, 1), CellState.FILL)
+    assert table != packed
@@ -0,0 +1,69 @@
+import os
+import time
+
+import pytest
+
+from game.board.board import Board
+from game.board.cell import RowInstructions
+from game.solver.iterative_solver import IterativeGuessSolver
+from game.solver.budget import Budget, GAVE_UP, TIME_LIMIT
+from game.solver.parallel_solver import ParallelGuessSolver, SearchWorkerError
+from game.solver.solvertools.guesslocator import ByOrderGuessLocator, ProbingGuessLocator
+from tests.boards import random_board, ambiguous_blocks_board
+
+PARENT_PID = os.getpid()
+
+
+class FailingInWorkerLocator(ByOrderGuessLocator):
+    def get_next_guess(self, last_guess):
+        if os.getpid() != PARENT_PID:
+            raise RuntimeError('worker failed')
+        return super().get_next_guess(last_guess)
+
+
+@pytest.mark.parametrize('locator_type, locator_args', [(ByOrderGuessLocator, ()), (ProbingGuessLocator, (True,))])
+def test_parallel_solver(locator_type, locator_args):
+    for seed in range(3):
+        board = random_board(12, 0.5, seed)
+        ParallelGuessSolver(board, use_line_solver=True, guess_locator_type=locator_type, locator_args=locator_args,
+                            processes=2).solve()
+        assert board.is_board_solved()
+
+
+def test_frontier_is_split_and_solved():
+    board = ambiguous_blocks_board(3)
+    solver = ParallelGuessSolver(board, use_line_solver=True, processes=2, frontier_size=4)
+    frontier = solver.build_frontier_()
+    assert len(frontier) == 4
+    assert board.get_level() == 0
+    solver.solve()
+    assert board.is_board_solved()
+
+
+def test_unsolvable_board():
+    # Two 2x2 blocks that each need a guess, and a last line whose clue fits neither of their solutions.
+    instructions = [RowInstructions.from_list(ins) for ins in [[1, 1], [1, 1], [], [1, 1], [1, 1]]]
+    board = Board(instructions, instructions[:-1] + [RowInstructions.from_list([2])])
+    ParallelGuessSolver(board, processes=2).solve()
+    assert not board.is_board_solved()
+
+
+def test_matches_sequential_on_hard_board():
+    board = random_board(20, 0.5, 7)
+    ParallelGuessSolver(board, use_line_solver=True, processes=3, frontier_size=2).solve()
+    expected = random_board(20, 0.5, 7)
+    IterativeGuessSolver(expected, use_line_solver=True).solve()
+    assert board.is_board_solved() and expected.is_board_solved()
+
+
+def test_failing_worker_stops_the_search():
+    solver = ParallelGuessSolver(random_board(12, 0.5, 0), guess_locator_type=FailingInWorkerLocator, processes=2)
+    with pytest.raises(SearchWorkerError, match='worker failed'):
+        solver.search_()
+
+
+def test_time_limit_stops_the_workers():
+    start = time.time()
+    result = ParallelGuessSolver(random_board(25, 0.5, 0), processes=2).solve_within(Budget(max_seconds=0.5))
+    assert result.status == GAVE_UP and result.limit == TIME_LIMIT
+    assert time.time() - start < 3
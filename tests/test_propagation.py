@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from game.board.board import Board
+from game.board.cell import CellState, Location, RowInstructions
+from game.solver.analyze_the_guess_solver import AnalyzeSkipUnchangedInfoGuessSolver
+from game.solver.solvertools.propagation import LinePropagator
+
+INSTRUCTIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'instructions')
+
+
+def simple_board():
+    # 3x3 cross:
+    #  . # .
+    #  # # #
+    #  . # .
+    return Board([RowInstructions.from_list([1]), RowInstructions.from_list([3]), RowInstructions.from_list([1])],
+                 [RowInstructions.from_list([1]), RowInstructions.from_list([3]), RowInstructions.from_list([1])])
+
+
+@pytest.mark.parametrize('use_line_solver', [False, True])
+def test_propagate_to_fixpoint(use_line_solver):
+    board = Board.from_instruction_file(os.path.join(INSTRUCTIONS_DIR, '1.ins'))
+    propagator = LinePropagator(board, use_line_solver)
+    propagator.push_all()
+    info_to_add = []
+    assert propagator.propagate(info_to_add)
+    assert board.is_board_solved()
+    assert len(info_to_add) == 30 * 30
+    assert not propagator.queue
+
+
+def test_only_pushed_lines_are_solved():
+    board = simple_board()
+    propagator = LinePropagator(board, True)
+    propagator.push_row(1)
+    info_to_add = []
+    assert propagator.propagate(info_to_add)
+    # The middle row is full, which makes every column solvable, and those fill in the other rows.
+    assert board.is_board_solved()
+    assert propagator.lines_solved == 1 + 3 + 2
+    propagator.push_row(1)
+    propagator.push_row(1)
+    assert len(propagator.queue) == 1
+
+
+def test_lowest_slack_first():
+    board = simple_board()
+    propagator = LinePropagator(board, True)
+    propagator.push_row(0)
+    propagator.push_row(1)
+    _, direction, index = propagator.queue[0]
+    assert index == 1
+
+
+def test_contradiction():
+    board = simple_board()
+    board.set_cell_state(Location(1, 1), CellState.NO_FILL)
+    propagator = LinePropagator(board, True)
+    propagator.push_all()
+    assert not propagator.propagate([])
+    assert not propagator.queue
+
+
+def test_skip_unchanged_solver():
+    board = Board.from_instruction_file(os.path.join(INSTRUCTIONS_DIR, '3.ins'))
+    AnalyzeSkipUnchangedInfoGuessSolver(board).solve()
+    assert board.is_board_solved()
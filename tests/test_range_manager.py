@@ -95,3 +95,25 @@ def test_next(test_tools):
 
 def test_attempt_solve(test_tools):
     assert True
+
+
+def test_indexes(test_tools):
+    manager = RangesManager(test_tools[FULL_TWO_PART_ROW])
+    assert [index in manager for index in range(-1, 6)] == [False, True, True, True, False, True, False]
+    assert manager.next_free == [0, 1, 2, 4, 4, 5]
+    assert manager.next_fill == [0, 1, 2, 4, 4, 5]
+    assert [manager.find_range(index) for index in range(6)] == [0, 0, 0, 1, 1, 2]
+    manager = RangesManager(test_tools[NO_IN_MIDDLE_ROW])
+    assert manager.next_free == [0, 1, 3, 3, 4, 5]
+    assert manager.next_fill == [5] * 6
+    assert manager.get_next_fill(7) == 5
+
+
+def test_next_and_reset(test_tools):
+    manager = RangesManager(test_tools[NO_IN_MIDDLE_ROW])
+    manager.next()
+    manager.next()
+    assert 1 not in manager and 3 in manager
+    assert manager.find_range(0) == 0 and manager[0].range == range(3, 5)
+    manager.reset()
+    assert 0 in manager and len(manager) == 2 and manager.find_range(2) == 1
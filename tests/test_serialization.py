@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from game.board.board import Board, CellTable
+from game.board.cell import Location, CellState
+from game.board.packed_table import PackedCellTable
+from game.board.serialization import pack_codes, unpack_codes, from_bytes, checkpoint_to_bytes, \
+    checkpoint_from_bytes, SearchState, MAGIC
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def test_pack_codes():
+    codes = bytes([0, 1, 2, 2, 1, 0, 1])
+    packed = pack_codes(codes)
+    assert len(packed) == 2
+    assert unpack_codes(packed, len(codes)) == codes
+    assert unpack_codes(pack_codes(b''), 0) == b''
+
+
+@pytest.mark.parametrize('table_type', [CellTable, PackedCellTable])
+def test_round_trip(table_type):
+    board = Board.from_file(os.path.join(DATA_DIR, 'images', 'N3.png'), True, table_type)
+    board.set_cell_state(Location(0, 0), CellState.FILL)
+    board.set_cell_state(Location(0, 0), CellState.NO_FILL)
+    board.set_cell_state(Location(9, 3), CellState.FILL)
+    data = board.to_bytes()
+    assert data.startswith(MAGIC)
+    # The solution grid of 100 cells takes 2 bits per cell.
+    assert len(board.to_bytes(with_steps=False)) == len(board.to_bytes(with_solution=False, with_steps=False)) + 25
+    loaded = Board.from_bytes(data, table_type)
+    assert loaded.row_instructions == board.row_instructions
+    assert loaded.column_instructions == board.column_instructions
+    assert loaded.encode_states() == board.encode_states()
+    assert loaded.solution_table.encode() == board.solution_table.encode()
+    assert loaded.steps == board.steps == 3
+    assert loaded.get_steps() == board.get_steps()
+    assert loaded.game_table.get_cell_steps() == board.game_table.get_cell_steps()
+    assert loaded.unset_cells == board.unset_cells
+
+
+def test_optional_parts():
+    board = Board.from_file(os.path.join(DATA_DIR, 'images', 'heart.png'), True)
+    board.set_cell_state(Location(1, 1), CellState.FILL)
+    board_data = from_bytes(board.to_bytes(with_solution=False, with_steps=False))
+    assert board_data.solution_codes is None and board_data.cell_steps is None
+    loaded = Board.from_bytes(board.to_bytes(with_solution=False, with_steps=False))
+    assert loaded.solution_table is None
+    assert loaded.get_steps() == 0
+    assert loaded.get_cell_state(Location(1, 1)) == CellState.FILL
+
+
+def test_save_and_load(tmp_path):
+    board = Board.from_instruction_file(os.path.join(DATA_DIR, 'instructions', '1.ins'))
+    board.set_cell_state(Location(2, 3), CellState.NO_FILL)
+    file_path = os.path.join(str(tmp_path), 'board.bin')
+    board.save(file_path)
+    assert os.listdir(str(tmp_path)) == ['board.bin']
+    loaded = Board.load(file_path, PackedCellTable)
+    assert loaded.encode_states() == board.encode_states()
+
+
+@pytest.mark.parametrize('data', [b'', b'XXXX' + bytes(20), MAGIC + bytes([1, 0, 5, 0, 0, 0, 5, 0, 0, 0])])
+def test_bad_data(data):
+    with pytest.raises(ValueError):
+        Board.from_bytes(data)
+
+
+def test_checkpoint_round_trip():
+    board = Board.from_file(os.path.join(DATA_DIR, 'images', 'N3.png'))
+    probes = [(1, 1, 1, True, [(1, 1, 1), (1, 2, 2)], [5, 6, 2 ** 40]), (1, 1, 2, False, [], [])]
+    search = SearchState(guesses=7, decisions=[(0, 1, 1, False), (2, 3, 2, True)], levels=[0, 2],
+                         trail=[(0, 1, 0, 0, 0), (0, 2, 0, 1, 0), (2, 3, 0, 2, 1)], last_version=2 ** 40,
+                         row_versions=[3] * 10, column_versions=[4] * 10, probes=probes)
+    checkpoint = checkpoint_from_bytes(checkpoint_to_bytes(board.to_bytes(), search))
+    assert checkpoint.search == search
+    assert checkpoint.board_data == from_bytes(board.to_bytes())
+    with pytest.raises(ValueError):
+        checkpoint_to_bytes(board.to_bytes(), search._replace(levels=[0]))
+    with pytest.raises(ValueError):
+        checkpoint_from_bytes(checkpoint_to_bytes(board.to_bytes(), search)[:-4])
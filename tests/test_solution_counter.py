@@ -0,0 +1,45 @@
+import os
+
+from game.board.board import Board
+from game.board.cell import RowInstructions, Location
+from game.solver.solution_counter import SolutionCounter
+from tests.boards import ambiguous_blocks_board
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+
+def test_unique_solution():
+    board = Board.from_file(os.path.join(DATA_DIR, 'images', 'N3.png'), True)
+    count = SolutionCounter(board, use_line_solver=True).count_solutions()
+    assert count.is_unique()
+    assert count.differing_cells == []
+    assert board.is_board_solved()
+    assert not board.is_there_mistake()
+
+
+def test_two_solutions():
+    board = ambiguous_blocks_board(1)
+    count = SolutionCounter(board, limit=5, use_line_solver=True).count_solutions()
+    assert count.solutions == 2 and count.complete
+    assert not count.is_unique()
+    assert sorted(count.differing_cells) == [Location(0, 0), Location(0, 1), Location(1, 0), Location(1, 1)]
+    assert board.is_board_solved()
+    assert board.get_level() == 0
+
+
+def test_stops_at_limit():
+    # Each of the four 2x2 blocks has its two filled cells on either diagonal, which makes 16 solutions.
+    counter = SolutionCounter(ambiguous_blocks_board(2), limit=3, use_line_solver=True)
+    count = counter.count_solutions()
+    assert count.solutions == 3 and not count.complete
+    assert len(set(counter.solutions)) == 3
+    for use_line_solver in [False, True]:
+        count = SolutionCounter(ambiguous_blocks_board(2), limit=100, use_line_solver=use_line_solver).count_solutions()
+        assert count.solutions == 16 and count.complete
+
+
+def test_no_solution():
+    board = Board([RowInstructions.from_list([1]), RowInstructions.from_list([])],
+                  [RowInstructions.from_list([]), RowInstructions.from_list([2])])
+    count = SolutionCounter(board).count_solutions()
+    assert count.solutions == 0 and count.complete